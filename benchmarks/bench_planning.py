@@ -0,0 +1,119 @@
+"""
+规划阶段微基准：大规模功能点下的去重、分配、索引、调度与序列化耗时
+
+用法：
+    python benchmarks/bench_planning.py                 # 默认100000个功能点
+    python benchmarks/bench_planning.py --features 20000 --agents 8
+
+只用到标准库和parallel_test_core的规划部分，不需要浏览器和LLM。
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parallel_test_core import (  # noqa: E402
+    FeatureDeduplicator,
+    FeaturePoint,
+    FeatureStore,
+    PriorityScheduler,
+    TaskAllocator,
+)
+
+CATEGORIES = ["auth", "navigation", "data_entry", "interaction", "display", "other"]
+TYPES = ["button", "link", "form", "input", "table", "menu"]
+
+
+def generate_features(count: int, duplicate_ratio: float = 0.2, seed: int = 0):
+    """生成count个功能点，其中约duplicate_ratio比例与之前的功能点重复"""
+    rng = random.Random(seed)
+    features = []
+    for i in range(count):
+        if features and rng.random() < duplicate_ratio:
+            source = rng.choice(features)
+            description, text = source.description, source.text
+            category, feature_type, page = source.category, source.type, source.page
+        else:
+            category = rng.choice(CATEGORIES)
+            feature_type = rng.choice(TYPES)
+            page = f"http://example.test/page/{rng.randrange(500)}"
+            description = f"{category} {feature_type} #{i}"
+            text = f"text-{i}"
+        features.append(FeaturePoint(
+            id=f"feature_{i}",
+            type=feature_type,
+            category=category,
+            description=description,
+            text=text,
+            priority=rng.randint(1, 3),
+            page=page,
+        ))
+    return features
+
+
+def timed(label: str, func, results: list):
+    """执行func并记录耗时"""
+    started = time.perf_counter()
+    value = func()
+    elapsed = time.perf_counter() - started
+    results.append((label, elapsed))
+    return value
+
+
+def drain(scheduler: PriorityScheduler, agent_ids: list) -> int:
+    """轮流为各Agent取任务直到队列清空"""
+    dispatched = 0
+    while True:
+        progressed = False
+        for agent_id in agent_ids:
+            feature = scheduler.next_feature(agent_id)
+            if feature is not None:
+                scheduler.mark_done(feature)
+                dispatched += 1
+                progressed = True
+        if not progressed:
+            return dispatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="规划阶段微基准")
+    parser.add_argument("--features", type=int, default=100000, help="功能点数量（默认100000）")
+    parser.add_argument("--agents", type=int, default=5, help="Agent数量（默认5）")
+    args = parser.parse_args()
+    
+    results = []
+    tracemalloc.start()
+    features = timed("生成功能点", lambda: generate_features(args.features), results)
+    feature_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    deduplicator = FeatureDeduplicator()
+    unique = timed("去重", lambda: deduplicator.deduplicate(features, verbose=False), results)
+    timed("建立索引(FeatureStore)", lambda: FeatureStore(unique), results)
+    
+    allocator = TaskAllocator(args.agents)
+    timed("分配(列表)", lambda: allocator.allocate(unique, verbose=False), results)
+    allocations = timed("分配(索引)", lambda: allocator.allocate(deduplicator.store, verbose=False), results)
+    
+    scheduler = timed("构建调度队列", lambda: PriorityScheduler(allocations), results)
+    agent_ids = [alloc["agent_id"] for alloc in allocations]
+    dispatched = timed("调度派发", lambda: drain(scheduler, agent_ids), results)
+    
+    timed("序列化(to_dict)", lambda: [feature.to_dict() for feature in unique], results)
+    
+    print(f"\n{'='*60}")
+    print(f"规划阶段微基准: {args.features}个功能点, {args.agents}个Agent")
+    print(f"{'='*60}")
+    print(f"去重后: {len(unique)}个功能点, 派发: {dispatched}个")
+    print(f"功能点内存: {feature_memory / 1024 / 1024:.1f}MB")
+    for label, elapsed in results:
+        print(f"  {label:<24} {elapsed * 1000:10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
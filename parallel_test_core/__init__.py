@@ -0,0 +1,53 @@
+"""
+并行网站测试核心库
+
+V1/V2/简化示例共用的配置、报告、浏览器管理、调度与测试引擎。
+子模块按需导入：只使用规划阶段（去重、分配）或报告工具时不会加载browser_use。
+"""
+
+import importlib
+
+_EXPORTS = {
+    "ParallelTestConfig": "config",
+    "load_targets": "config",
+    "FeatureDiscovery": "discovery",
+    "FeaturePoint": "features",
+    "FeatureDeduplicator": "features",
+    "FeatureStore": "features",
+    "feature_fingerprint": "features",
+    "auth_action": "features",
+    "PageTemplateDetector": "features",
+    "TaskAllocator": "features",
+    "save_features": "features",
+    "load_features": "features",
+    "simulate": "planner",
+    "recommend_agent_count": "planner",
+    "run_plan_only": "planner",
+    "PriorityScheduler": "scheduling",
+    "FairShareScheduler": "scheduling",
+    "TimedLLM": "dashboard",
+    "ProgressDashboard": "dashboard",
+    "ReportHistory": "history",
+    "diff_reports": "history",
+    "PageChangeDetector": "incremental",
+    "TestDataGenerator": "testdata",
+    "parse_forms": "testdata",
+    "BaseTestLogger": "report",
+    "TaskTestLogger": "report",
+    "TestLogger": "report",
+    "AgentRunner": "runner",
+    "create_browsers": "runner",
+    "close_browsers": "runner",
+    "run_with_browsers": "runner",
+    "ParallelWebsiteTestAgentV2": "engine",
+    "BatchTestRunner": "engine",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+    return getattr(module, name)
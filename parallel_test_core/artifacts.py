@@ -0,0 +1,132 @@
+"""
+测试证据（截图、HTML快照、控制台日志、HAR）的异步存储
+
+编码、压缩和写盘都在线程池（或进程池）中完成，不阻塞共享事件循环的Agent。
+文件按内容哈希寻址存储，相同的截图/快照只保存一份。
+"""
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Set
+
+# 证据类型 -> (文件扩展名, 是否gzip压缩)
+ARTIFACT_FORMATS = {
+    "screenshot": (".png", False),
+    "html": (".html.gz", True),
+    "console": (".json.gz", True),
+    "har": (".har.gz", True),
+}
+
+
+def _encode(kind: str, payload: Any) -> bytes:
+    """把采集到的原始数据转换为字节"""
+    if kind == "screenshot" and isinstance(payload, str):
+        return base64.b64decode(payload)
+    if isinstance(payload, bytes):
+        return payload
+    if isinstance(payload, str):
+        return payload.encode("utf-8")
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _encode_and_write(root: str, kind: str, payload: Any) -> Dict[str, Any]:
+    """在工作线程/进程中执行：编码、哈希、压缩并写入内容寻址存储"""
+    extension, compress = ARTIFACT_FORMATS.get(kind, (".bin", True))
+    raw = _encode(kind, payload)
+    digest = hashlib.sha256(raw).hexdigest()
+    path = os.path.join(root, digest[:2], digest + extension)
+    
+    deduplicated = os.path.exists(path)
+    if not deduplicated:
+        data = gzip.compress(raw, compresslevel=6, mtime=0) if compress else raw
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再原子替换，并发写入同一内容时也不会产生半截文件；
+        # 同一进程的多个线程可能同时写同一内容，每次写入使用独立的临时文件
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", prefix=digest + ".", dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    
+    return {
+        "kind": kind,
+        "sha256": digest,
+        "path": path,
+        "bytes": len(raw),
+        "stored_bytes": os.path.getsize(path),
+        "deduplicated": deduplicated,
+    }
+
+
+class ArtifactStore:
+    """异步证据存储
+    
+    submit()立即返回一个链接列表并在后台完成写入，写入完成后链接会追加到该列表中，
+    因此可以直接放进TestLogger的details里；保存报告前调用drain()等待所有写入完成。
+    """
+    
+    def __init__(self, root: str = "./artifacts", max_workers: int = 2, use_processes: bool = False):
+        self.root = root
+        self.executor: Executor = (
+            ProcessPoolExecutor(max_workers=max_workers) if use_processes
+            else ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="artifact")
+        )
+        self.pending: Set[asyncio.Future] = set()
+        self.stored = 0
+        self.deduplicated = 0
+        self.failed = 0
+        self.total_bytes = 0
+        self.stored_bytes = 0
+    
+    def submit(self, artifacts: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """后台保存一组证据，返回会被逐步填充的链接列表"""
+        links: List[Dict[str, Any]] = []
+        for kind, payload in artifacts.items():
+            if payload is None:
+                continue
+            task = asyncio.ensure_future(self._store(kind, payload, links))
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+        return links
+    
+    async def _store(self, kind: str, payload: Any, links: List[Dict[str, Any]]):
+        loop = asyncio.get_running_loop()
+        try:
+            entry = await loop.run_in_executor(self.executor, _encode_and_write, self.root, kind, payload)
+        except Exception as e:
+            self.failed += 1
+            links.append({"kind": kind, "error": str(e)})
+            return
+        
+        if entry["deduplicated"]:
+            self.deduplicated += 1
+        else:
+            self.stored += 1
+            self.stored_bytes += entry["stored_bytes"]
+        self.total_bytes += entry["bytes"]
+        links.append(entry)
+    
+    async def drain(self):
+        """等待所有后台写入完成"""
+        while self.pending:
+            await asyncio.gather(*list(self.pending), return_exceptions=True)
+    
+    def close(self):
+        """关闭线程池/进程池"""
+        self.executor.shutdown(wait=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """存储统计"""
+        return {
+            "root": self.root,
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "failed": self.failed,
+            "bytes": self.total_bytes,
+            "stored_bytes": self.stored_bytes,
+        }
@@ -0,0 +1,57 @@
+"""
+测试配置
+"""
+
+import json
+from typing import List
+
+
+class ParallelTestConfig:
+    """并行测试配置"""
+    
+    def __init__(self, target_url: str, username: str = "admin", password: str = "admin",
+                 name: str = ""):
+        self.name = name or target_url
+        self.target_url = target_url
+        self.username = username
+        self.password = password
+        self.num_parallel_agents = 5
+        self.headless = False
+        self.flash_mode = True
+        self.time_budget = None  # 墙钟预算（秒），None表示不限制
+        self.dashboard = False  # 是否在终端显示实时进度面板
+        self.status_port = None  # 本地JSON状态接口端口，None表示不启动
+        self.page_urls: List[str] = []  # 额外需要发现的页面，同布局区域跨页面共享
+        self.artifact_mode = "failures"  # 证据采集：none / failures（仅失败）/ all
+        self.artifact_dir = "./artifacts"  # 证据的内容寻址存储目录
+        self.network_checks = False  # 用CDP网络/控制台记录按分类规则验证测试结果，并保存HAR证据（实验性）
+        self.history_dir = "./report_history"  # 运行历史目录，None表示不保存历史
+        self.flaky_policy = "rerun"  # 不稳定功能点：none / rerun（失败时重跑一次）/ quarantine（隔离，不再测试）
+        self.flaky_window = 5  # 检测不稳定功能点时参考的最近运行次数
+        self.form_data = "valid"  # 表单测试数据：none（由LLM自行填写）/ valid（有效数据）/ boundary（另加边界值用例）
+        self.speculation_budget = 0  # 推测执行：拖尾功能点副本数上限，0表示关闭（默认）
+        self.speculation_factor = 2.0  # 执行时间超过预期耗时的倍数后视为拖尾
+        self.shutdown_grace = 30  # 中断后等待执行中功能点完成的宽限期（秒）
+        self.close_timeout = 10  # 关闭浏览器的超时（秒），超时后结束残留进程
+        self.page_store = None  # 增量发现的页面存储文件，None表示每次都完整发现
+        self.use_sitemap = True  # 增量发现时参考sitemap.xml的lastmod
+        self.form_data_seed = "parallel-test"  # 测试数据的随机种子，相同种子生成相同数据
+
+
+def load_targets(path: str) -> List[ParallelTestConfig]:
+    """从JSON文件加载目标列表
+    
+    文件格式：[{"name": "tenant-a", "target_url": "...", "username": "...", "password": "..."}]
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    
+    configs = []
+    for i, entry in enumerate(entries):
+        configs.append(ParallelTestConfig(
+            target_url=entry["target_url"],
+            username=entry.get("username", "admin"),
+            password=entry.get("password", "admin"),
+            name=entry.get("name", f"target-{i+1}"),
+        ))
+    return configs
@@ -0,0 +1,247 @@
+"""
+实时进度面板与LLM调用统计
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class TimedLLM:
+    """LLM客户端代理：统计ainvoke调用次数、耗时和token用量，其余属性透传给原客户端"""
+    
+    def __init__(self, llm, on_latency=None):
+        self._llm = llm
+        self._on_latency = on_latency
+        self.calls = 0
+        self.llm_seconds = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+    
+    async def ainvoke(self, *args, **kwargs):
+        start = time.monotonic()
+        try:
+            response = await self._llm.ainvoke(*args, **kwargs)
+            self._record_usage(response)
+            return response
+        finally:
+            elapsed = time.monotonic() - start
+            self.calls += 1
+            self.llm_seconds += elapsed
+            if self._on_latency is not None:
+                self._on_latency(elapsed)
+    
+    def _record_usage(self, response):
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        self.input_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        self.output_tokens += getattr(usage, "completion_tokens", 0) or 0
+    
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+
+def final_result_text(result) -> str:
+    """取Agent的最终结果文本"""
+    final_result = getattr(result, "final_result", None)
+    text = final_result() if callable(final_result) else None
+    return str(text if text is not None else result)
+
+
+def collect_metrics(result, llm: TimedLLM, wall_seconds: float) -> Dict[str, Any]:
+    """从Agent历史和LLM代理中提取结构化指标"""
+    number_of_steps = getattr(result, "number_of_steps", None)
+    steps = number_of_steps() if callable(number_of_steps) else 0
+    
+    # browser_use在步骤出错时会重试，出错的步骤数即重试次数
+    errors = getattr(result, "errors", None)
+    retries = sum(1 for e in errors() if e) if callable(errors) else 0
+    
+    # LLM代理未拿到用量时，退回Agent历史中的用量汇总
+    usage = getattr(result, "usage", None)
+    input_tokens = llm.input_tokens or getattr(usage, "total_prompt_tokens", 0) or 0
+    output_tokens = llm.output_tokens or getattr(usage, "total_completion_tokens", 0) or 0
+    
+    return {
+        "steps": steps,
+        "llm_calls": llm.calls,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "llm_seconds": round(llm.llm_seconds, 2),
+        "browser_seconds": round(max(wall_seconds - llm.llm_seconds, 0.0), 2),
+        "wall_seconds": round(wall_seconds, 2),
+        "retries": retries,
+    }
+
+
+class ProgressDashboard:
+    """实时进度面板
+    
+    定期从调度器读取进度，在终端刷新显示各Agent状态、吞吐量、LLM延迟分位数、
+    浏览器内存和预计完成时间；可选地在本地端口提供JSON状态接口。
+    """
+    
+    def __init__(self, scheduler, agent_ids: List[str], default_feature_seconds: float = 60.0):
+        self.scheduler = scheduler
+        self.agent_ids = agent_ids
+        self.default_feature_seconds = default_feature_seconds
+        self.llm_latencies: deque = deque(maxlen=1000)
+        self.started = time.monotonic()
+        self.server = None
+        self.refresh_task: Optional[asyncio.Task] = None
+    
+    async def start(self, show: bool = True, port: Optional[int] = None):
+        """启动终端刷新和（可选）状态接口"""
+        self.started = time.monotonic()
+        if show:
+            self.refresh_task = asyncio.create_task(self.run())
+        if port is not None:
+            await self.start_server(port)
+    
+    async def stop(self):
+        """停止终端刷新和状态接口"""
+        if self.refresh_task is not None:
+            self.refresh_task.cancel()
+            try:
+                await self.refresh_task
+            except asyncio.CancelledError:
+                pass
+            self.refresh_task = None
+        await self.stop_server()
+    
+    def record_llm_latency(self, seconds: float):
+        """记录一次LLM调用耗时"""
+        self.llm_latencies.append(seconds)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """生成状态快照"""
+        progress = self.scheduler.progress()
+        elapsed = time.monotonic() - self.started
+        durations = progress["durations"]
+        
+        running = {entry["agent_id"]: entry for entry in progress["in_flight"]}
+        agents = []
+        for agent_id in self.agent_ids:
+            entry = running.get(agent_id)
+            agents.append({
+                "agent_id": agent_id,
+                "state": "running" if entry else "idle",
+                "feature": entry["feature"] if entry else None,
+                "elapsed_seconds": round(entry["elapsed"], 1) if entry else None,
+            })
+        
+        # 预计完成时间：在途任务的剩余时间 + 待派发任务按平均耗时均摊到所有Agent
+        average = sum(durations) / len(durations) if durations else self.default_feature_seconds
+        in_flight_remaining = max((max(average - e["elapsed"], 0.0) for e in progress["in_flight"]), default=0.0)
+        eta = in_flight_remaining + progress["pending"] * average / max(len(self.agent_ids), 1)
+        
+        return {
+            "elapsed_seconds": round(elapsed, 1),
+            "agents": agents,
+            "pending": progress["pending"],
+            "in_flight": len(progress["in_flight"]),
+            "completed": progress["completed"],
+            "skipped": progress["skipped"],
+            "features_per_minute": round(progress["completed"] / elapsed * 60, 2) if elapsed > 0 else 0.0,
+            "llm_latency": self._latency_percentiles(),
+            "browser_rss_mb": self._browser_rss_mb(),
+            "eta_seconds": round(eta, 1),
+            "projected_finish": datetime.fromtimestamp(time.time() + eta).isoformat(timespec="seconds"),
+        }
+    
+    def render(self) -> str:
+        """渲染终端面板"""
+        snap = self.snapshot()
+        latency = snap["llm_latency"]
+        rss = f"{snap['browser_rss_mb']}MB" if snap["browser_rss_mb"] is not None else "N/A"
+        
+        lines = [
+            f"{'='*60}",
+            f"运行 {snap['elapsed_seconds']}s | 待测 {snap['pending']} | 执行中 {snap['in_flight']} | "
+            f"完成 {snap['completed']} | 跳过 {snap['skipped']}",
+            f"吞吐 {snap['features_per_minute']}个/分钟 | LLM延迟 p50={latency['p50']}s "
+            f"p90={latency['p90']}s p99={latency['p99']}s | 浏览器内存 {rss}",
+            f"预计剩余 {snap['eta_seconds']}s，预计完成于 {snap['projected_finish']}",
+        ]
+        for agent in snap["agents"]:
+            if agent["state"] == "running":
+                lines.append(f"  [{agent['agent_id']}] {agent['feature']} ({agent['elapsed_seconds']}s)")
+            else:
+                lines.append(f"  [{agent['agent_id']}] 空闲")
+        lines.append(f"{'='*60}")
+        return "\n".join(lines)
+    
+    async def run(self, interval: float = 2.0):
+        """周期性刷新面板，直到被取消"""
+        while True:
+            if sys.stdout.isatty():
+                print("\033[2J\033[H", end="")
+            print(self.render(), flush=True)
+            await asyncio.sleep(interval)
+    
+    async def start_server(self, port: int, host: str = "127.0.0.1"):
+        """启动本地JSON状态接口：GET任意路径返回snapshot()"""
+        self.server = await asyncio.start_server(self._handle_request, host, port)
+        print(f"状态接口: http://{host}:{port}/")
+    
+    async def stop_server(self):
+        """关闭状态接口"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+    
+    async def _handle_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # 读取并丢弃请求头
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            
+            body = json.dumps(self.snapshot(), ensure_ascii=False).encode("utf-8")
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/json; charset=utf-8\r\n"
+                + f"Content-Length: {len(body)}\r\n".encode()
+                + b"Connection: close\r\n\r\n"
+                + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+    
+    def _latency_percentiles(self) -> Dict[str, Any]:
+        values = sorted(self.llm_latencies)
+        
+        def percentile(p: float):
+            if not values:
+                return None
+            return round(values[min(int(len(values) * p), len(values) - 1)], 2)
+        
+        return {"count": len(values), "p50": percentile(0.5), "p90": percentile(0.9), "p99": percentile(0.99)}
+    
+    def _browser_rss_mb(self) -> Optional[float]:
+        """浏览器子进程的常驻内存总和（需要psutil）"""
+        if psutil is None:
+            return None
+        try:
+            children = psutil.Process(os.getpid()).children(recursive=True)
+            total = 0
+            for child in children:
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return round(total / 1024 / 1024, 1)
+        except psutil.Error:
+            return None
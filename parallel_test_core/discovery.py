@@ -0,0 +1,218 @@
+"""
+功能点发现（阶段1）
+"""
+
+from collections import Counter
+from typing import Any, List, Optional
+
+from .features import FeaturePoint
+from .runner import AgentRunner
+
+
+class FeatureDiscovery:
+    """功能点发现器"""
+    
+    def __init__(self, target_url: str, runner: Optional[AgentRunner] = None):
+        self.target_url = target_url
+        self.runner = runner or AgentRunner()
+        self.discovered_features: List[FeaturePoint] = []
+    
+    async def discover(self, browser: Optional[Any] = None, llm=None,
+                       page_url: str = "", skip_regions: Optional[List[str]] = None) -> List[FeaturePoint]:
+        """发现页面的功能点（可复用外部传入的浏览器和LLM客户端）
+        
+        page_url为空时发现target_url；skip_regions为已在其他页面测试过的公共布局区域，
+        发现时跳过其中的功能点。
+        """
+        page_url = page_url or self.target_url
+        
+        print(f"\n{'='*60}")
+        print(f"阶段1: 功能点发现（单线程） {page_url}")
+        print(f"{'='*60}\n")
+        
+        skip_note = ""
+        if skip_regions:
+            skip_note = f"\n注意：以下公共布局区域已在其他页面测试过，请跳过其中的功能点，只关注本页面特有的区域：{'、'.join(skip_regions)}\n"
+        
+        discovery_task = f"""
+访问 {page_url} 并完成功能点发现任务：
+{skip_note}
+请仔细分析页面，识别以下类型的功能点：
+
+1. **认证功能**：
+   - 登录表单（用户名、密码输入框）
+   - 注册表单
+   - 登出按钮
+   - 忘记密码链接
+
+2. **导航功能**：
+   - 顶部导航栏的链接
+   - 侧边栏菜单项
+   - 面包屑导航
+   - 底部链接
+
+3. **表单功能**（不包括登录表单）：
+   - 搜索表单
+   - 数据提交表单
+   - 过滤表单
+   - 设置表单
+
+4. **交互元素**：
+   - 普通按钮（不包括表单提交按钮）
+   - 下拉菜单
+   - 标签页
+   - 模态框触发器
+   - 折叠面板
+
+5. **数据展示**：
+   - 数据表格
+   - 列表
+   - 卡片
+   - 图表
+
+6. **特殊功能**：
+   - 文件上传
+   - 文件下载
+   - 打印按钮
+   - 导出功能
+
+对于每个功能点，请记录：
+- 功能类型
+- 功能描述
+- 所在位置
+- 显示文本
+
+请以结构化的方式列出所有发现的功能点，避免重复。
+        """
+        
+        try:
+            result = await self.runner.run(
+                task=discovery_task,
+                llm=llm,
+                browser=browser,
+                max_steps=30,
+            )
+            
+            # 解析发现的功能点
+            page_features = self._parse_discovery_result(str(result), page=page_url)
+            self.discovered_features.extend(page_features)
+            
+            print(f"\n发现功能点总数: {len(page_features)}")
+            self._print_feature_summary()
+            
+            return page_features
+            
+        except Exception as e:
+            print(f"功能点发现失败: {e}")
+            return []
+    
+    def adopt(self, features: List[FeaturePoint]) -> List[FeaturePoint]:
+        """并入本地存储中未变化页面的功能点，按发现顺序重新编号避免与新发现的功能点ID冲突"""
+        for feature in features:
+            feature.id = f"feature_{len(self.discovered_features)}"
+            self.discovered_features.append(feature)
+        return features
+    
+    def _parse_discovery_result(self, result: str, page: str = "") -> List[FeaturePoint]:
+        """解析发现结果（简化版，实际应该更智能）"""
+        features = []
+        
+        # 这里是简化的解析逻辑
+        # 实际应该使用output_model_schema来获取结构化输出
+        
+        # 为演示目的，创建一些示例功能点
+        # 实际使用时应该从LLM的结构化输出中解析
+        
+        # 多页面发现时功能点ID全局递增
+        feature_id = len(self.discovered_features)
+        
+        # 从结果中提取功能点（简化版）
+        if "登录" in result or "login" in result.lower():
+            features.append(FeaturePoint(
+                id=f"feature_{feature_id}",
+                type="form",
+                category="auth",
+                description="登录表单",
+                text="登录",
+                priority=1
+            ))
+            feature_id += 1
+        
+        if "注册" in result or "register" in result.lower():
+            features.append(FeaturePoint(
+                id=f"feature_{feature_id}",
+                type="form",
+                category="auth",
+                description="注册表单",
+                text="注册",
+                priority=2
+            ))
+            feature_id += 1
+        
+        if "搜索" in result or "search" in result.lower():
+            features.append(FeaturePoint(
+                id=f"feature_{feature_id}",
+                type="search",
+                category="interaction",
+                description="搜索功能",
+                text="搜索",
+                priority=1
+            ))
+            feature_id += 1
+        
+        if "导航" in result or "navigation" in result.lower() or "菜单" in result:
+            features.append(FeaturePoint(
+                id=f"feature_{feature_id}",
+                type="link",
+                category="navigation",
+                description="导航链接",
+                text="导航",
+                priority=1
+            ))
+            feature_id += 1
+        
+        if "表单" in result or "form" in result.lower():
+            features.append(FeaturePoint(
+                id=f"feature_{feature_id}",
+                type="form",
+                category="data_entry",
+                description="数据表单",
+                text="表单",
+                priority=2
+            ))
+            feature_id += 1
+        
+        if "按钮" in result or "button" in result.lower():
+            features.append(FeaturePoint(
+                id=f"feature_{feature_id}",
+                type="button",
+                category="interaction",
+                description="交互按钮",
+                text="按钮",
+                priority=2
+            ))
+            feature_id += 1
+        
+        if "表格" in result or "table" in result.lower():
+            features.append(FeaturePoint(
+                id=f"feature_{feature_id}",
+                type="data_table",
+                category="display",
+                description="数据表格",
+                text="表格",
+                priority=2
+            ))
+            feature_id += 1
+        
+        for feature in features:
+            feature.page = page
+        
+        return features
+    
+    def _print_feature_summary(self):
+        """打印功能点摘要"""
+        by_category = Counter(feature.category for feature in self.discovered_features)
+        
+        print("\n功能点分类统计：")
+        for category, count in by_category.items():
+            print(f"  {category}: {count}个")
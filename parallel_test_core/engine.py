@@ -0,0 +1,773 @@
+"""
+V2测试引擎：发现 → 去重 → 分配 → 并行测试，以及多目标批量模式
+"""
+
+import asyncio
+import json
+import re
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from .config import ParallelTestConfig
+from .dashboard import ProgressDashboard, TimedLLM, collect_metrics, final_result_text
+from .discovery import FeatureDiscovery
+from .artifacts import ArtifactStore
+from .features import FeaturePoint, FeatureDeduplicator, PageTemplateDetector, TaskAllocator, auth_action
+from .incremental import PageChangeDetector
+from .history import ReportHistory, print_diff, result_key
+from .navigation import NavigationCache
+from .observer import NetworkObserver
+from .report import TestLogger
+from .runner import AgentRunner, close_browsers, create_browsers, run_with_browsers
+from .scheduling import PriorityScheduler, FairShareScheduler
+from .shutdown import ShutdownController
+from .testdata import FormSchema, TestDataGenerator, parse_forms, select_form
+
+
+class ParallelWebsiteTestAgentV2:
+    """并行网站自动化测试Agent V2 - 零重复版本"""
+    
+    def __init__(self, config: ParallelTestConfig, logger: Optional[TestLogger] = None, llm=None,
+                 runner: Optional[AgentRunner] = None, navigation_cache: Optional[NavigationCache] = None,
+                 artifact_store: Optional[ArtifactStore] = None,
+                 shutdown: Optional[ShutdownController] = None,
+                 history: Optional[ReportHistory] = None):
+        self.config = config
+        # 未传入时在run()中创建，批量模式下由BatchTestRunner统一托管
+        self.shutdown = shutdown
+        self.runner = runner or AgentRunner()
+        # 批量模式下共享浏览器的多个目标共享同一个导航缓存
+        self.navigation_cache = navigation_cache or NavigationCache()
+        self.logger = logger or TestLogger()
+        self.logger.test_results["target_url"] = config.target_url
+        self.llm = llm  # 批量模式下多个目标共享同一个LLM客户端
+        self.dashboard: Optional[ProgressDashboard] = None
+        
+        # 未传入共享的证据存储时按配置自行创建，并在run()结束时关闭
+        self.owns_artifact_store = artifact_store is None and config.artifact_mode != "none"
+        self.artifact_store = artifact_store
+        if self.owns_artifact_store:
+            self.artifact_store = ArtifactStore(config.artifact_dir)
+        
+        # 运行历史：检测不稳定功能点，并在运行结束后与上一次运行对比（批量模式下所有目标共享）
+        self.history = history
+        if self.history is None and config.history_dir:
+            self.history = ReportHistory(config.history_dir)
+        self.flaky: Dict[str, Dict[str, Any]] = {}
+        
+        # 推测执行：功能点ID -> 所有尝试；已有尝试先完成（记录了结果）的功能点
+        self.attempts: Dict[str, List[asyncio.Future]] = {}
+        self.finished: set = set()
+        self.speculation_wins = 0
+        
+        self.discovery = FeatureDiscovery(config.target_url, runner=self.runner)
+        self.template_detector = PageTemplateDetector()
+        self.change_detector = PageChangeDetector(config.page_store) if config.page_store else None
+        self.deduplicator = FeatureDeduplicator()
+        self.allocator = TaskAllocator(config.num_parallel_agents)
+        self.data_generator = TestDataGenerator(config.form_data_seed)
+        self.form_schemas: Dict[str, List[FormSchema]] = {}  # 页面URL -> 通过HTTP解析的表单
+    
+    async def run(self):
+        """运行完整的测试流程"""
+        print(f"\n{'='*60}")
+        print(f"并行网站测试 V2 - 零重复版本")
+        print(f"目标网站: {self.config.target_url}")
+        print(f"{'='*60}\n")
+        
+        if self.shutdown is None:
+            self.shutdown = ShutdownController(self.config.shutdown_grace, self.config.close_timeout)
+        self.shutdown.install()
+        
+        try:
+            # 阶段1-3: 发现、去重、分配
+            allocations = await self.plan()
+            
+            if not allocations:
+                return
+            
+            # 阶段4: 并行测试
+            await self.run_parallel_tests(allocations)
+            
+        except asyncio.CancelledError:
+            # 规划阶段收到中断信号：不再继续，保存部分报告
+            if not self.shutdown.consume_cancel():
+                raise
+            print("\n测试已中断")
+        
+        except Exception as e:
+            print(f"\n测试过程中发生错误: {e}")
+        
+        finally:
+            self.shutdown.uninstall()
+            if self.shutdown.requested:
+                self.logger.test_results["interrupted"] = True
+            
+            if self.owns_artifact_store:
+                await self.artifact_store.drain()
+                self.artifact_store.close()
+                self.logger.test_results["artifacts"] = self.artifact_store.stats()
+            
+            # 保存报告
+            self.logger.save_report()
+            self.record_history()
+    
+    async def plan(self, browser: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """执行阶段1-3，返回任务分配；任一阶段无结果时返回空列表"""
+        # 阶段1: 发现功能点
+        features = await self.discover_features(browser=browser)
+        
+        if not features:
+            print("未发现任何功能点，测试终止")
+            return []
+        
+        # 阶段2: 去重
+        unique_features = self.deduplicator.deduplicate(features)
+        self.logger.set_discovered_features(unique_features)
+        unique_features = self._apply_flaky_policy(unique_features)
+        
+        if not unique_features:
+            print("去重后无功能点，测试终止")
+            return []
+        
+        # 阶段3: 分配任务
+        allocations = self.allocator.allocate(unique_features)
+        
+        if not allocations:
+            print("任务分配失败，测试终止")
+        
+        return allocations
+    
+    def record_history(self):
+        """保存本次报告到运行历史，并与该目标的上一次运行对比
+        
+        被中断或没有任何测试结果的运行不保存：这些功能点在对比中会显示为"已消失"，
+        还会占用检测不稳定功能点的运行窗口。
+        """
+        if self.history is None:
+            return
+        
+        results = self.logger.test_results
+        if results.get("interrupted") or not results["test_details"]:
+            print("本次运行被中断或没有测试结果，不保存到运行历史")
+            return
+        
+        self.history.record(self.logger.test_results)
+        diff = self.history.diff_last(self.config.target_url, self.config.flaky_window)
+        if diff is not None:
+            print_diff(diff)
+    
+    def _apply_flaky_policy(self, features: List[FeaturePoint]) -> List[FeaturePoint]:
+        """从历史中找出不稳定功能点；quarantine策略下将其移出本次测试"""
+        if self.history is None or self.config.flaky_policy == "none":
+            return features
+        
+        self.flaky = self.history.flaky_features(self.config.target_url, self.config.flaky_window)
+        if not self.flaky:
+            return features
+        
+        if self.config.flaky_policy != "quarantine":
+            print(f"历史中有{len(self.flaky)}个不稳定功能点，失败时将重跑一次")
+            return features
+        
+        quarantined = [f for f in features if self._is_flaky(f)]
+        if quarantined:
+            self.logger.log_quarantined(quarantined)
+        return [f for f in features if not self._is_flaky(f)]
+    
+    def _is_flaky(self, feature: FeaturePoint) -> bool:
+        return result_key(self.config.target_url, feature.to_dict()) in self.flaky
+    
+    async def discover_features(self, browser: Optional[Any] = None) -> List[FeaturePoint]:
+        """发现功能点；配置了多个页面时，公共模板区域只在首次出现的页面上发现"""
+        if self.change_detector is not None:
+            return await self._discover_incremental(browser)
+        
+        if not self.config.page_urls:
+            return await self.discovery.discover(browser=browser, llm=self.llm)
+        
+        features = []
+        for page in [self.config.target_url] + self.config.page_urls:
+            html = await self.template_detector.fetch(page)
+            self.template_detector.analyze_page(page, html)
+            
+            page_features = await self.discovery.discover(
+                browser=browser,
+                llm=self.llm,
+                page_url=page,
+                skip_regions=self.template_detector.covered_regions(page),
+            )
+            self.template_detector.annotate(page_features, page)
+            features.extend(page_features)
+        
+        print(f"\n模板检测: {self.template_detector.shared_region_count()}个布局区域在多个页面间共享")
+        
+        return features
+    
+    async def _discover_incremental(self, browser: Optional[Any] = None) -> List[FeaturePoint]:
+        """增量发现：HTTP预检判断页面是否变化，只对变化的页面运行发现Agent"""
+        pages = [self.config.target_url] + self.config.page_urls
+        sitemap = await self.change_detector.fetch_sitemap(self.config.target_url) if self.config.use_sitemap else {}
+        
+        features = []
+        reused = 0
+        for page in pages:
+            check = await self.change_detector.check(page, sitemap.get(page))
+            
+            if not check["changed"]:
+                print(f"页面未变化（{check['reason']}），复用本地功能点: {page}")
+                self.template_detector.register_regions(page, self.change_detector.stored_regions(page))
+                features.extend(self.discovery.adopt(self.change_detector.stored_features(page)))
+                self.change_detector.record(page, check)
+                reused += 1
+                continue
+            
+            html = check["html"] or await self.template_detector.fetch(page)
+            regions = self.template_detector.analyze_page(page, html)
+            page_features = await self.discovery.discover(
+                browser=browser,
+                llm=self.llm,
+                page_url=page,
+                skip_regions=self.template_detector.covered_regions(page),
+            )
+            self.template_detector.annotate(page_features, page)
+            features.extend(page_features)
+            
+            # 发现失败（没有功能点）时不更新记录，下次运行重新发现
+            if page_features:
+                self.change_detector.record(page, check, page_features, regions)
+        
+        self.change_detector.save()
+        print(f"\n增量发现: {len(pages) - reused}个页面重新发现, {reused}个页面复用本地功能点")
+        
+        return features
+    
+    async def run_parallel_tests(self, allocations: List[Dict[str, Any]]):
+        """并行运行测试"""
+        print(f"\n{'='*60}")
+        print(f"阶段4: 并行测试（{len(allocations)}个Agent）")
+        print(f"{'='*60}\n")
+        
+        scheduler = PriorityScheduler(
+            allocations,
+            time_budget=self.config.time_budget,
+            speculation_budget=self.config.speculation_budget,
+            speculation_factor=self.config.speculation_factor,
+        )
+        agent_ids = [alloc["agent_id"] for alloc in allocations]
+        
+        if self.config.dashboard or self.config.status_port is not None:
+            self.dashboard = ProgressDashboard(scheduler, agent_ids)
+        
+        try:
+            scheduler.start()
+            if self.dashboard is not None:
+                await self.dashboard.start(show=self.config.dashboard, port=self.config.status_port)
+            if self.shutdown is not None:
+                self.shutdown.on_request(scheduler.stop)
+            
+            # 每个Agent独占一个浏览器，从全局优先级队列中取任务
+            await run_with_browsers(
+                self.runner,
+                len(agent_ids),
+                './test-profile-v2',
+                lambda i, browser: self.run_agent_tests(agent_ids[i], scheduler, browser),
+                headless=self.config.headless,
+                shutdown=self.shutdown,
+            )
+            
+            print(f"\n{'='*60}")
+            print("所有并行测试已完成！")
+            print(f"{'='*60}\n")
+            
+        finally:
+            if self.dashboard is not None:
+                await self.dashboard.stop()
+                print(self.dashboard.render())
+            
+            if scheduler.skipped:
+                reason = "测试已中断" if scheduler.stopped else "墙钟预算已耗尽"
+                print(f"{reason}，跳过 {len(scheduler.skipped)} 个功能点")
+                self.logger.log_skipped(scheduler.skipped)
+            if scheduler.cancelled:
+                self.logger.log_cancelled(scheduler.cancelled)
+            
+            self.logger.test_results["navigation_cache"] = self.navigation_cache.stats()
+            if scheduler.speculated:
+                self.logger.test_results["speculation"] = {
+                    "launched": len(scheduler.speculated),
+                    "won": self.speculation_wins,
+                    "features": [feature.description for feature in scheduler.speculated],
+                }
+    
+    async def run_agent_tests(self, agent_id: str, scheduler: PriorityScheduler, browser: Any):
+        """运行单个Agent的测试：循环领取功能点直到队列为空或预算耗尽，
+        之后在还有功能点执行中时为拖尾功能点推测执行副本"""
+        print(f"\n[{agent_id}] 开始测试")
+        
+        while True:
+            feature = scheduler.next_feature(agent_id)
+            if feature is None:
+                if await self._speculate(agent_id, scheduler, browser):
+                    continue
+                break
+            
+            try:
+                await self.run_feature_test(agent_id, feature, browser)
+            except asyncio.CancelledError:
+                # 中断后宽限期已过：记为取消，不计入完成
+                scheduler.mark_cancelled(feature)
+                raise
+            finally:
+                if feature.id in scheduler.in_flight:
+                    scheduler.mark_done(feature)
+    
+    async def _speculate(self, agent_id: str, scheduler: PriorityScheduler, browser: Any,
+                         poll_interval: float = 1.0) -> bool:
+        """空闲时等待出现拖尾功能点并执行其副本；执行过副本返回True，无事可做时返回False"""
+        while scheduler.in_flight and scheduler.can_speculate():
+            feature = scheduler.next_speculative(agent_id)
+            if feature is not None:
+                print(f"[{agent_id}] 推测执行拖尾功能点: {feature.description}")
+                await self.run_feature_test(agent_id, feature, browser, speculative=True)
+                return True
+            await asyncio.sleep(poll_interval)
+        return False
+    
+    async def run_feature_test(self, agent_id: str, feature: FeaturePoint, browser: Any,
+                               speculative: bool = False):
+        """测试单个功能点
+        
+        同一功能点可能同时有推测执行的副本：先完成的尝试记录结果并取消其他尝试，
+        被取消的尝试不记录结果。
+        """
+        attempt = asyncio.ensure_future(self._test_feature(agent_id, feature, browser))
+        attempts = self.attempts.setdefault(feature.id, [])
+        attempts.append(attempt)
+        
+        try:
+            status, details = await attempt
+        except asyncio.CancelledError:
+            if feature.id not in self.finished:
+                raise
+            # 其他尝试已先完成，浏览器停在未知状态
+            self.navigation_cache.invalidate(browser)
+            print(f"[{agent_id}] 已由其他Agent先完成，取消: {feature.description}")
+            return
+        
+        if feature.id in self.finished:
+            return
+        self.finished.add(feature.id)
+        
+        for other in attempts:
+            if other is not attempt:
+                other.cancel()
+        if len(attempts) > 1:
+            details["speculation"] = {"attempts": len(attempts), "winner": agent_id, "speculative": speculative}
+            if speculative:
+                self.speculation_wins += 1
+        
+        await self.logger.log_test(
+            agent_id=agent_id,
+            feature=feature,
+            status=status,
+            details=details
+        )
+    
+    async def _test_feature(self, agent_id: str, feature: FeaturePoint, browser: Any) -> tuple:
+        """执行功能点测试；历史上不稳定的功能点失败时按配置重跑一次"""
+        status, details = await self._execute_feature(feature, browser)
+        
+        if status == "failed" and self.config.flaky_policy == "rerun" and self._is_flaky(feature):
+            print(f"[{agent_id}] 不稳定功能点失败，重跑: {feature.description}")
+            first_attempt = details
+            status, details = await self._execute_feature(feature, browser)
+            details["flaky_rerun"] = {"first_attempt": first_attempt}
+        
+        return status, details
+    
+    async def _execute_feature(self, feature: FeaturePoint, browser: Any) -> tuple:
+        """执行一次功能点测试，返回 (状态, 详情)"""
+        # 在功能点所在页面上测试（额外页面上发现的功能点不在首页）
+        page = feature.page or self.config.target_url
+        
+        # 浏览器已在该页面时不再要求Agent重新访问；确认已登录时也不再要求登录（登录测试本身除外）
+        auth_user = self.config.username
+        action = auth_action(feature)
+        reused = self.navigation_cache.can_reuse(browser, page, auth_user)
+        self.navigation_cache.record_start(reused)
+        
+        if reused and action != "login" and self.navigation_cache.logged_in_as(browser, page) == auth_user:
+            opening = f"当前页面已经是 {page}（已使用 {auth_user} 登录），不需要重新访问或登录，直接在当前页面测试以下功能点："
+        elif reused:
+            opening = f"当前页面已经是 {page}，不需要重新访问，直接在当前页面测试以下功能点："
+        else:
+            opening = f"访问 {page} 并测试以下功能点："
+        
+        test_data = await self._form_test_data(feature, browser, reused)
+        
+        task = f"""
+{opening}
+
+{self._generate_test_task(feature, test_data)}
+
+测试要求：
+1. 记录测试的结果
+2. 如果需要登录，使用用户名: {self.config.username}, 密码: {self.config.password}
+3. 详细描述测试的执行过程和结果
+        """
+        
+        # 观察器记录本功能点期间的控制台错误（作为证据），开启network_checks时还记录请求，用于确定性验证
+        observer = None
+        if self.config.network_checks or self._collects_artifacts():
+            observer = await self.runner.observer_for(browser, network=self.config.network_checks)
+        if observer is not None:
+            observer.reset()
+        
+        llm = self._create_llm()
+        started = time.monotonic()
+        
+        try:
+            result = await self.runner.run(
+                task=task,
+                llm=llm,
+                browser=browser,
+                flash_mode=self.config.flash_mode,
+                max_steps=50,
+            )
+            
+            if not reused:
+                self.navigation_cache.record_navigation_time(self._first_step_seconds(result))
+            
+            details = {
+                "result": final_result_text(result)[:200],
+                "metrics": collect_metrics(result, llm, time.monotonic() - started),
+            }
+            self._attach_test_data(details, test_data)
+            
+            # Agent正常结束后，再用网络/控制台规则验证；浏览器不支持观察器时只看Agent是否报错
+            status = "passed"
+            if observer is not None and self.config.network_checks:
+                details["verification"] = observer.verify(feature.category, action)
+                if not details["verification"]["passed"]:
+                    status = "failed"
+            
+            await self._update_navigation_state(browser, feature, status)
+            await self._attach_artifacts(browser, status, details, observer)
+            return status, details
+            
+        except Exception as e:
+            self.navigation_cache.invalidate(browser)
+            
+            details = {
+                "error": str(e),
+                "metrics": collect_metrics(None, llm, time.monotonic() - started),
+            }
+            self._attach_test_data(details, test_data)
+            await self._attach_artifacts(browser, "failed", details, observer)
+            return "failed", details
+    
+    async def _form_test_data(self, feature: FeaturePoint, browser: Any,
+                              reused: bool) -> Optional[Dict[str, Any]]:
+        """为数据录入类功能点生成确定性的表单测试数据，页面上找不到表单时返回None
+        
+        浏览器已停在目标页面时直接读取渲染后的DOM，否则通过HTTP获取页面（按URL缓存）。
+        """
+        if self.config.form_data == "none" or feature.category != "data_entry":
+            return None
+        
+        forms = parse_forms(await self.runner.page_html(browser)) if reused else []
+        if not forms:
+            page = feature.page or self.config.target_url
+            if page not in self.form_schemas:
+                self.form_schemas[page] = parse_forms(await self.template_detector.fetch(page))
+            forms = self.form_schemas[page]
+        
+        form = select_form(forms)
+        if form is None:
+            return None
+        return self.data_generator.generate(form, boundary=self.config.form_data == "boundary")
+    
+    @staticmethod
+    def _attach_test_data(details: Dict[str, Any], test_data: Optional[Dict[str, Any]]):
+        """将使用的测试数据写入报告，便于复现失败"""
+        if test_data is not None:
+            details["test_data"] = {key: value for key, value in test_data.items() if key != "instruction"}
+    
+    def _collects_artifacts(self) -> bool:
+        """是否采集测试证据"""
+        return self.artifact_store is not None and self.config.artifact_mode != "none"
+    
+    async def _attach_artifacts(self, browser: Any, status: str, details: Dict[str, Any],
+                                observer: Optional[NetworkObserver] = None):
+        """按配置采集证据并交给后台存储；details["artifacts"]在写入完成后被填充
+        
+        控制台日志不依赖network_checks；HAR只在观察器记录了网络请求时才有。
+        """
+        if not self._collects_artifacts() or (self.config.artifact_mode == "failures" and status == "passed"):
+            return
+        
+        artifacts = await self.runner.capture_artifacts(browser)
+        if observer is not None:
+            artifacts["console"] = observer.console_log()
+            if observer.network:
+                artifacts["har"] = observer.to_har()
+        if artifacts:
+            details["artifacts"] = self.artifact_store.submit(artifacts)
+    
+    async def _update_navigation_state(self, browser: Any, feature: FeaturePoint, status: str):
+        """记录测试结束后浏览器所在页面和登录身份
+        
+        只有通过的登录测试才确认登录身份；其他功能点沿用之前在同一个源上确认的身份，
+        浏览器跳转到其他源后身份视为未知。
+        失败的认证测试、登出、切换账号或注册后登录状态未知，下次重新导航。
+        """
+        action = auth_action(feature)
+        if feature.category == "auth" and (status != "passed" or action in ("logout", "switch", "register")):
+            self.navigation_cache.invalidate(browser)
+            return
+        
+        url = await self.runner.current_url(browser)
+        auth_user = (self.config.username if action == "login"
+                     else self.navigation_cache.logged_in_as(browser, url))
+        self.navigation_cache.update(browser, url, auth_user)
+    
+    @staticmethod
+    def _first_step_seconds(result) -> Optional[float]:
+        """Agent第一步（通常是打开页面）的耗时"""
+        history = getattr(result, "history", None)
+        if not history:
+            return None
+        metadata = getattr(history[0], "metadata", None)
+        return getattr(metadata, "duration_seconds", None)
+    
+    def _create_llm(self) -> TimedLLM:
+        """创建测试用LLM客户端，统计调用次数/token；启用进度面板时同时上报延迟"""
+        on_latency = self.dashboard.record_llm_latency if self.dashboard is not None else None
+        return TimedLLM(self.llm or self.runner.create_llm(), on_latency)
+    
+    def _generate_test_task(self, feature: FeaturePoint, test_data: Optional[Dict[str, Any]] = None) -> str:
+        """为功能点生成测试任务；有表单测试数据时，数据录入类功能点按数据一次填写整个表单"""
+        if test_data is not None:
+            return f"- 测试{feature.description}：找到表单，{test_data['instruction']}"
+        
+        # 登录测试要求真正提交一次登录（浏览器可能已保留登录Cookie），网络验证据此检查POST和Set-Cookie
+        action = auth_action(feature)
+        if action == "login":
+            return f"- 测试{feature.description}：如果页面已经处于登录状态，先退出登录；然后找到登录表单，填写用户名和密码，提交并验证结果"
+        if action == "logout":
+            return f"- 测试{feature.description}：找到退出登录的入口，执行并验证已经退出登录"
+        
+        task_templates = {
+            "auth": f"- 测试{feature.description}：找到表单，填写用户名和密码，提交并验证结果",
+            "navigation": f"- 测试{feature.description}：找到导航链接，点击并验证页面跳转",
+            "data_entry": f"- 测试{feature.description}：找到表单，智能填充字段，提交并验证",
+            "interaction": f"- 测试{feature.description}：找到交互元素，执行操作并观察结果",
+            "display": f"- 测试{feature.description}：找到数据展示区域，验证数据正确显示",
+        }
+        
+        return task_templates.get(feature.category, f"- 测试{feature.description}")
+
+
+class BatchTestRunner:
+    """多目标批量测试
+    
+    所有目标共享一个浏览器池和一个LLM客户端，功能点发现按浏览器池大小限流，
+    测试阶段所有目标的功能点进入同一个FairShareScheduler全局队列。
+    每个目标输出独立报告，另外输出一份汇总报告。
+    """
+    
+    def __init__(self, configs: List[ParallelTestConfig], num_browsers: int = 5,
+                 headless: bool = False, time_budget: Optional[float] = None,
+                 output_file: str = "parallel_test_report_batch.json",
+                 dashboard: bool = False, status_port: Optional[int] = None,
+                 runner: Optional[AgentRunner] = None, artifact_dir: str = "./artifacts",
+                 shutdown_grace: float = 30, close_timeout: float = 10,
+                 history_dir: Optional[str] = "./report_history"):
+        self._check_unique_names(configs)
+        self.configs = configs
+        self.shutdown_grace = shutdown_grace
+        self.close_timeout = close_timeout
+        self.runner = runner or AgentRunner()
+        self.num_browsers = num_browsers
+        self.headless = headless
+        self.time_budget = time_budget
+        self.show_dashboard = dashboard
+        self.status_port = status_port
+        self.dashboard: Optional[ProgressDashboard] = None
+        self.output_file = output_file
+        self.llm = self.runner.create_llm()
+        self.navigation_cache = NavigationCache()
+        self.artifact_store = ArtifactStore(artifact_dir)
+        # 所有目标共享一个运行历史，索引由同一个实例依次写入
+        self.history = ReportHistory(history_dir) if history_dir else None
+        
+        self.runners: Dict[str, ParallelWebsiteTestAgentV2] = {}
+        for config in configs:
+            config.num_parallel_agents = num_browsers
+            config.headless = headless
+            config.history_dir = history_dir
+            logger = TestLogger(output_file=f"parallel_test_report_v2_{self._slug(config.name)}.json")
+            self.runners[config.name] = ParallelWebsiteTestAgentV2(
+                config, logger=logger, llm=self.llm, runner=self.runner,
+                navigation_cache=self.navigation_cache, artifact_store=self.artifact_store,
+                history=self.history
+            )
+    
+    async def run(self):
+        """运行批量测试"""
+        print(f"\n{'='*60}")
+        print(f"批量测试: {len(self.configs)}个目标, 共享{self.num_browsers}个浏览器")
+        print(f"{'='*60}\n")
+        
+        browsers = create_browsers(self.runner, self.num_browsers, './test-profile-batch', self.headless)
+        pool: asyncio.Queue = asyncio.Queue()
+        for browser in browsers:
+            pool.put_nowait(browser)
+        
+        scheduler = FairShareScheduler(time_budget=self.time_budget)
+        shutdown = ShutdownController(self.shutdown_grace, self.close_timeout)
+        shutdown.install()
+        shutdown.on_request(scheduler.stop)
+        
+        try:
+            # 阶段1-3: 每个目标的发现都从共享浏览器池借用浏览器
+            plans = await asyncio.gather(
+                *[self._plan_target(name, pool) for name in self.runners],
+                return_exceptions=True
+            )
+            for name, allocations in zip(self.runners, plans):
+                if isinstance(allocations, Exception):
+                    print(f"[{name}] 规划失败: {allocations}")
+                    continue
+                if allocations:
+                    scheduler.add_target(name, allocations)
+            
+            # 阶段4: 全局公平调度
+            agent_ids = [f"Agent-{i+1}" for i in range(len(browsers))]
+            if self.show_dashboard or self.status_port is not None:
+                self.dashboard = ProgressDashboard(scheduler, agent_ids)
+                for runner in self.runners.values():
+                    runner.dashboard = self.dashboard
+                await self.dashboard.start(show=self.show_dashboard, port=self.status_port)
+            
+            scheduler.start()
+            await run_with_browsers(
+                self.runner,
+                len(browsers),
+                './test-profile-batch',
+                lambda i, browser: self._worker(agent_ids[i], scheduler, browser),
+                browsers=browsers,
+                shutdown=shutdown,
+            )
+            
+        except asyncio.CancelledError:
+            # 规划阶段收到中断信号：不再继续，保存部分报告
+            if not shutdown.consume_cancel():
+                raise
+            print("\n批量测试已中断")
+        
+        finally:
+            shutdown.uninstall()
+            if self.dashboard is not None:
+                await self.dashboard.stop()
+            
+            await self.artifact_store.drain()
+            self.artifact_store.close()
+            
+            for name, runner in self.runners.items():
+                if name in scheduler.schedulers:
+                    target = scheduler.schedulers[name]
+                    if target.skipped:
+                        runner.logger.log_skipped(target.skipped)
+                    if target.cancelled:
+                        runner.logger.log_cancelled(target.cancelled)
+                if shutdown.requested:
+                    runner.logger.test_results["interrupted"] = True
+                runner.logger.save_report()
+                runner.record_history()
+            
+            self.save_combined_report()
+            
+            await self.runner.detach_observers(browsers)
+            await close_browsers(browsers, timeout=self.close_timeout, profile_prefix='./test-profile-batch')
+    
+    async def _plan_target(self, name: str, pool: asyncio.Queue) -> List[Dict[str, Any]]:
+        """借用一个浏览器完成目标的阶段1-3"""
+        browser = await pool.get()
+        try:
+            return await self.runners[name].plan(browser=browser)
+        finally:
+            pool.put_nowait(browser)
+    
+    async def _worker(self, agent_id: str, scheduler: FairShareScheduler, browser: Any):
+        """共享Worker：从全局队列领取任意目标的功能点"""
+        while True:
+            item = scheduler.next_feature(agent_id)
+            if item is None:
+                break
+            
+            target_name, feature = item
+            try:
+                await self.runners[target_name].run_feature_test(agent_id, feature, browser)
+            except asyncio.CancelledError:
+                scheduler.mark_cancelled(target_name, feature)
+                raise
+            finally:
+                if feature.id in scheduler.schedulers[target_name].in_flight:
+                    scheduler.mark_done(target_name, feature)
+    
+    def save_combined_report(self):
+        """保存汇总报告"""
+        targets = []
+        for name, runner in self.runners.items():
+            results = runner.logger.test_results
+            targets.append({
+                "name": name,
+                "target_url": results["target_url"],
+                "report_file": runner.logger.output_file,
+                "total_features": results["total_features"],
+                "tested_features": results["tested_features"],
+                "passed_tests": results["passed_tests"],
+                "failed_tests": results["failed_tests"],
+                "skipped_tests": results["skipped_tests"],
+            })
+        
+        combined = {
+            "end_time": datetime.now().isoformat(),
+            "total_targets": len(targets),
+            "total_features": sum(t["total_features"] for t in targets),
+            "passed_tests": sum(t["passed_tests"] for t in targets),
+            "failed_tests": sum(t["failed_tests"] for t in targets),
+            "skipped_tests": sum(t["skipped_tests"] for t in targets),
+            "navigation_cache": self.navigation_cache.stats(),
+            "artifacts": self.artifact_store.stats(),
+            "targets": targets,
+        }
+        with open(self.output_file, 'w', encoding='utf-8') as f:
+            json.dump(combined, f, ensure_ascii=False, indent=2)
+        
+        print(f"\n汇总报告已保存到: {self.output_file}")
+    
+    @classmethod
+    def _check_unique_names(cls, configs: List[ParallelTestConfig]):
+        """目标名用作报告和历史的键、报告文件名，重名或文件名冲突时报错"""
+        names: Dict[str, str] = {}
+        slugs: Dict[str, str] = {}
+        for config in configs:
+            if config.name in names:
+                raise ValueError(f"目标名重复: {config.name!r}")
+            slug = cls._slug(config.name)
+            if slug in slugs:
+                raise ValueError(
+                    f"目标名 {slugs[slug]!r} 和 {config.name!r} 的报告文件名相同"
+                    f"（parallel_test_report_v2_{slug}.json），请修改其中一个"
+                )
+            names[config.name] = slug
+            slugs[slug] = config.name
+    
+    @staticmethod
+    def _slug(name: str) -> str:
+        """将目标名转换为可用作文件名的形式"""
+        return re.sub(r'[^A-Za-z0-9_-]+', '_', name).strip('_') or "target"
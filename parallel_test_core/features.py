@@ -0,0 +1,456 @@
+"""
+功能点模型与规划阶段（去重、模板检测、任务分配）
+
+本模块只依赖标准库，可以在不加载浏览器/LLM的情况下使用。
+"""
+
+import asyncio
+import hashlib
+import json
+import sys
+import urllib.request
+from dataclasses import dataclass, fields
+from html.parser import HTMLParser
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Union
+
+# Python 3.10+ 使用__slots__，数万个功能点时显著减少内存
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_OPTIONS)
+class FeaturePoint:
+    """功能点数据结构"""
+    id: str
+    type: str  # form, button, link, search, data_table
+    category: str  # auth, navigation, data_entry, interaction, display
+    description: str
+    selector: str = ""
+    text: str = ""
+    priority: int = 1
+    page: str = ""  # 功能点所在页面URL
+    region: str = ""  # 所在布局区域的模板哈希（见PageTemplateDetector）
+    
+    def __post_init__(self):
+        # 类型/分类/页面/区域取值很少，驻留后所有功能点共享同一个字符串对象
+        self.type = sys.intern(self.type)
+        self.category = sys.intern(self.category)
+        self.page = sys.intern(self.page)
+        self.region = sys.intern(self.region)
+    
+    def to_dict(self):
+        # 字段都是标量，直接取值，避免asdict的递归深拷贝
+        return {name: getattr(self, name) for name in _FEATURE_FIELDS}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FeaturePoint":
+        return cls(**data)
+
+
+_FEATURE_FIELDS = tuple(f.name for f in fields(FeaturePoint))
+
+
+def feature_fingerprint(feature: FeaturePoint) -> str:
+    """生成功能点指纹"""
+    # 使用类型、分类和描述生成唯一标识
+    content = f"{feature.type}_{feature.category}_{feature.description}_{feature.text}"
+    
+    # 公共模板区域内的功能点按区域哈希去重（跨页面只测一次），
+    # 页面特有区域内的功能点按页面区分
+    scope = feature.region or feature.page
+    if scope:
+        content = f"{scope}_{content}"
+    
+    return hashlib.md5(content.encode()).hexdigest()
+
+
+# 认证类功能点的动作 -> 关键词；按顺序匹配（"退出登录"同时含"登录"，先判断登出）
+_AUTH_ACTION_KEYWORDS = (
+    ("logout", ("退出", "登出", "注销", "logout", "log out", "sign out", "signout")),
+    ("switch", ("切换", "switch")),
+    ("register", ("注册", "register", "sign up", "signup")),
+    ("login", ("登录", "登陆", "login", "log in", "sign in", "signin")),
+)
+
+
+def auth_action(feature: FeaturePoint) -> Optional[str]:
+    """认证类功能点的动作：login / logout / switch / register，无法判断或非认证类时返回None"""
+    if feature.category != "auth":
+        return None
+    text = f"{feature.description} {feature.text}".lower()
+    for action, keywords in _AUTH_ACTION_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return action
+    return None
+
+
+class FeatureStore:
+    """功能点存储
+    
+    保持插入顺序，同时维护按分类、页面和指纹的二级索引，
+    分组和查重不再需要对整个列表做线性扫描。
+    """
+    
+    def __init__(self, features: Iterable[FeaturePoint] = ()):
+        self.features: List[FeaturePoint] = []
+        self.by_category: Dict[str, List[FeaturePoint]] = {}
+        self.by_page: Dict[str, List[FeaturePoint]] = {}
+        self.by_fingerprint: Dict[str, FeaturePoint] = {}
+        for feature in features:
+            self.add(feature)
+    
+    def add(self, feature: FeaturePoint, fingerprint: Optional[str] = None) -> bool:
+        """添加功能点，指纹已存在时不添加并返回False"""
+        fingerprint = fingerprint or feature_fingerprint(feature)
+        if fingerprint in self.by_fingerprint:
+            return False
+        
+        self.by_fingerprint[fingerprint] = feature
+        self.features.append(feature)
+        self.by_category.setdefault(feature.category, []).append(feature)
+        self.by_page.setdefault(feature.page, []).append(feature)
+        return True
+    
+    def get(self, fingerprint: str) -> Optional[FeaturePoint]:
+        """按指纹查找功能点"""
+        return self.by_fingerprint.get(fingerprint)
+    
+    def category_counts(self) -> Dict[str, int]:
+        """各分类的功能点数量"""
+        return {category: len(features) for category, features in self.by_category.items()}
+    
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """序列化为字典列表"""
+        return [feature.to_dict() for feature in self.features]
+    
+    def __len__(self) -> int:
+        return len(self.features)
+    
+    def __iter__(self) -> Iterator[FeaturePoint]:
+        return iter(self.features)
+
+
+def save_features(path: str, features: List[FeaturePoint]):
+    """保存功能点列表（供规划模式复用，避免重复发现）"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([feature.to_dict() for feature in features], f, ensure_ascii=False, indent=2)
+
+
+def load_features(path: str) -> List[FeaturePoint]:
+    """加载保存的功能点列表"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [FeaturePoint.from_dict(data) for data in json.load(f)]
+
+
+class FeatureDeduplicator:
+    """功能点去重器
+    
+    去重结果累积在self.store中（多次调用之间共享），可直接交给TaskAllocator使用其分类索引。
+    """
+    
+    # 逐条打印的重复功能点上限，超出部分只打印数量
+    max_printed_duplicates = 20
+    
+    def __init__(self):
+        self.store = FeatureStore()
+    
+    def deduplicate(self, features: List[FeaturePoint], verbose: bool = True) -> List[FeaturePoint]:
+        """去重功能点"""
+        if verbose:
+            print(f"\n{'='*60}")
+            print("阶段2: 功能点去重")
+            print(f"{'='*60}\n")
+            
+            print(f"去重前: {len(features)}个功能点")
+        
+        unique_features = []
+        duplicates = 0
+        
+        for feature in features:
+            # 指纹已在存储中的功能点视为重复
+            if self.store.add(feature, self._generate_fingerprint(feature)):
+                unique_features.append(feature)
+                continue
+            
+            duplicates += 1
+            if verbose and duplicates <= self.max_printed_duplicates:
+                print(f"  跳过重复功能点: {feature.description}")
+        
+        if verbose:
+            if duplicates > self.max_printed_duplicates:
+                print(f"  ……另有{duplicates - self.max_printed_duplicates}个重复功能点")
+            print(f"去重后: {len(unique_features)}个功能点")
+        
+        return unique_features
+    
+    def _generate_fingerprint(self, feature: FeaturePoint) -> str:
+        """生成功能点指纹"""
+        return feature_fingerprint(feature)
+
+
+class _LayoutRegionParser(HTMLParser):
+    """将HTML解析为布局区域
+    
+    每个地标元素（header/nav/aside/footer/main/form/table或带landmark role的元素）
+    是一个区域，区域骨架只记录标签和class，忽略文本，重复的兄弟节点只记一次，
+    因此不同页面上的同一个组件（即使数据行数不同）得到相同的骨架。
+    """
+    
+    LANDMARK_TAGS = {"header", "nav", "aside", "footer", "main", "form", "table"}
+    LANDMARK_ROLES = {"banner", "navigation", "complementary", "contentinfo", "main", "search"}
+    VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input",
+                 "link", "meta", "source", "track", "wbr"}
+    
+    def __init__(self):
+        super().__init__()
+        self.stack: List[str] = []
+        self.open_regions: List[Dict[str, Any]] = []
+        self.regions: List[Dict[str, Any]] = []
+    
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        depth = len(self.stack)
+        
+        for region in self.open_regions:
+            self._add_token(region, depth, tag, attrs)
+        
+        if tag in self.VOID_TAGS:
+            return
+        
+        label = self._landmark_label(tag, attrs)
+        if label:
+            region = {"label": label, "depth": depth, "tokens": [], "text": [], "last": {}, "skip_depth": None}
+            self.open_regions.append(region)
+            self.regions.append(region)
+        
+        self.stack.append(tag)
+    
+    def handle_endtag(self, tag):
+        if tag not in self.stack:
+            return
+        
+        # 容忍未闭合的标签：一直弹出到匹配的开始标签
+        while self.stack:
+            popped = self.stack.pop()
+            self._close(len(self.stack))
+            if popped == tag:
+                break
+    
+    def handle_data(self, data):
+        text = data.strip()
+        if text:
+            # 重复兄弟节点只在骨架中折叠，文本（菜单项名称等）仍然全部保留
+            for region in self.open_regions:
+                region["text"].append(text)
+    
+    def _landmark_label(self, tag: str, attrs: Dict[str, Any]) -> str:
+        role = attrs.get("role") or ""
+        if role in self.LANDMARK_ROLES:
+            return role
+        if tag in self.LANDMARK_TAGS:
+            return tag
+        return ""
+    
+    def _add_token(self, region: Dict[str, Any], depth: int, tag: str, attrs: Dict[str, Any]):
+        if region["skip_depth"] is not None:
+            return
+        
+        relative = depth - region["depth"]
+        classes = ".".join(sorted((attrs.get("class") or "").split()))
+        token = f"{relative}:{tag}.{classes}"
+        
+        # 重复的兄弟节点（如表格行、菜单项）只记录第一个
+        if region["last"].get(relative) == token:
+            if tag not in self.VOID_TAGS:
+                region["skip_depth"] = depth
+            return
+        
+        region["last"][relative] = token
+        for deeper in [d for d in region["last"] if d > relative]:
+            del region["last"][deeper]
+        region["tokens"].append(token)
+    
+    def _close(self, depth: int):
+        for region in self.open_regions:
+            if region["skip_depth"] == depth:
+                region["skip_depth"] = None
+        self.open_regions = [r for r in self.open_regions if r["depth"] != depth]
+
+
+class PageTemplateDetector:
+    """页面模板检测器
+    
+    对每个页面的布局区域计算结构哈希，出现在多个页面上的区域（公共页头、侧边栏、
+    表格组件等）视为模板区域：只在第一次出现的页面上发现和测试，
+    后续页面只处理页面特有的区域。
+    """
+    
+    def __init__(self):
+        self.page_regions: Dict[str, List[Dict[str, Any]]] = {}
+        self.region_pages: Dict[str, List[str]] = {}
+    
+    async def fetch(self, url: str) -> str:
+        """通过HTTP获取页面HTML（在线程中执行，不阻塞事件循环）"""
+        def _get():
+            with urllib.request.urlopen(url, timeout=10) as response:
+                charset = response.headers.get_content_charset() or "utf-8"
+                return response.read().decode(charset, errors="replace")
+        
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, _get)
+        except Exception as e:
+            print(f"获取页面失败 {url}: {e}")
+            return ""
+    
+    def analyze_page(self, page: str, html: str) -> List[Dict[str, Any]]:
+        """解析页面布局区域并记录各区域哈希"""
+        parser = _LayoutRegionParser()
+        parser.feed(html)
+        parser.close()
+        
+        regions = []
+        for region in parser.regions:
+            skeleton = f"{region['label']}|{'|'.join(region['tokens'])}"
+            regions.append({
+                "label": region["label"],
+                "depth": region["depth"],
+                "hash": hashlib.md5(skeleton.encode()).hexdigest()[:16],
+                "text": " ".join(region["text"]),
+            })
+        
+        self.register_regions(page, regions)
+        return regions
+    
+    def register_regions(self, page: str, regions: List[Dict[str, Any]]):
+        """记录页面的布局区域（增量发现时可直接使用上次保存的解析结果）"""
+        self.page_regions[page] = regions
+        for region in regions:
+            pages = self.region_pages.setdefault(region["hash"], [])
+            if page not in pages:
+                pages.append(page)
+    
+    def covered_regions(self, page: str) -> List[str]:
+        """页面上已在更早页面出现过的公共区域标签"""
+        labels = []
+        for region in self.page_regions.get(page, []):
+            if self.region_pages[region["hash"]][0] != page and region["label"] not in labels:
+                labels.append(region["label"])
+        return labels
+    
+    def annotate(self, features: List[FeaturePoint], page: str):
+        """为功能点标注所在区域：取文本包含功能点文本的最内层区域"""
+        regions = self.page_regions.get(page, [])
+        for feature in features:
+            needle = feature.text or feature.description
+            matches = [r for r in regions if needle and needle in r["text"]]
+            if matches:
+                feature.region = max(matches, key=lambda r: r["depth"])["hash"]
+    
+    def shared_region_count(self) -> int:
+        """出现在多个页面上的区域数量"""
+        return sum(1 for pages in self.region_pages.values() if len(pages) > 1)
+
+
+class TaskAllocator:
+    """任务分配器"""
+    
+    def __init__(self, num_agents: int):
+        self.num_agents = num_agents
+    
+    # 打印分配结果时每个Agent最多列出的功能点数
+    max_printed_features = 10
+    
+    def allocate(self, features: Union[List[FeaturePoint], FeatureStore],
+                 verbose: bool = True) -> List[Dict[str, Any]]:
+        """分配任务给Agent（verbose=False时不打印，供规划器反复试算）
+        
+        传入FeatureStore时直接使用其分类索引。
+        """
+        if verbose:
+            print(f"\n{'='*60}")
+            print(f"阶段3: 任务分配（分配给{self.num_agents}个Agent）")
+            print(f"{'='*60}\n")
+        
+        # 按分类分组
+        by_category = self._group_by_category(features)
+        
+        # 创建任务分配
+        allocations = self._create_allocations(by_category)
+        
+        # 打印分配结果
+        if verbose:
+            self._print_allocations(allocations)
+        
+        return allocations
+    
+    def _group_by_category(self, features: Union[List[FeaturePoint], FeatureStore]) -> Dict[str, List[FeaturePoint]]:
+        """按分类分组"""
+        if isinstance(features, FeatureStore):
+            return features.by_category
+        
+        groups = {}
+        for feature in features:
+            if feature.category not in groups:
+                groups[feature.category] = []
+            groups[feature.category].append(feature)
+        return groups
+    
+    def _create_allocations(self, grouped_features: Dict[str, List[FeaturePoint]]) -> List[Dict[str, Any]]:
+        """创建任务分配"""
+        allocations = []
+        
+        # 定义分类到Agent的映射
+        category_mapping = {
+            "auth": 0,          # Agent-1: 认证功能
+            "navigation": 1,    # Agent-2: 导航功能
+            "data_entry": 2,    # Agent-3: 数据输入
+            "interaction": 3,   # Agent-4: 交互元素
+            "display": 4,       # Agent-5: 数据展示
+        }
+        
+        # 初始化Agent任务列表
+        agent_tasks = [[] for _ in range(self.num_agents)]
+        agent_categories = [[] for _ in range(self.num_agents)]
+        
+        # 分配功能点
+        for category, features in grouped_features.items():
+            agent_idx = category_mapping.get(category, 0) % self.num_agents
+            agent_tasks[agent_idx].extend(features)
+            agent_categories[agent_idx].append(category)
+        
+        # 每个Agent内部按优先级排序（稳定排序，同优先级保持发现顺序）
+        for features in agent_tasks:
+            features.sort(key=lambda f: f.priority)
+        
+        # 创建任务描述
+        for i, features in enumerate(agent_tasks):
+            if features:
+                allocation = {
+                    "agent_id": f"Agent-{i+1}",
+                    "features": features,
+                    "description": self._create_task_description(features, agent_categories[i]),
+                    "count": len(features)
+                }
+                allocations.append(allocation)
+        
+        return allocations
+    
+    def _create_task_description(self, features: List[FeaturePoint],
+                                 categories: Optional[List[str]] = None) -> str:
+        """创建任务描述"""
+        # dict.fromkeys保持首次出现顺序，输出稳定
+        categories = categories or list(dict.fromkeys(f.category for f in features))
+        types = dict.fromkeys(f.type for f in features)
+        return f"测试{len(features)}个功能点 (类别: {', '.join(categories)}, 类型: {', '.join(types)})"
+    
+    def _print_allocations(self, allocations: List[Dict[str, Any]]):
+        """打印分配结果"""
+        print("任务分配结果：")
+        for alloc in allocations:
+            print(f"\n{alloc['agent_id']}:")
+            print(f"  任务数量: {alloc['count']}")
+            print(f"  任务描述: {alloc['description']}")
+            print(f"  功能点列表:")
+            for feature in alloc['features'][:self.max_printed_features]:
+                print(f"    - {feature.description} ({feature.type})")
+            if alloc['count'] > self.max_printed_features:
+                print(f"    ……另有{alloc['count'] - self.max_printed_features}个")
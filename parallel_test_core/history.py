@@ -0,0 +1,251 @@
+"""
+报告历史：保存每次运行的报告，按功能点指纹对比两次运行，检测不稳定（flaky）功能点
+
+历史目录结构：
+    report_history/
+        index.json          运行列表 + 按功能点指纹索引的逐次结果
+        runs/<run_id>.json  每次运行的完整报告
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .features import FeaturePoint, feature_fingerprint
+
+
+def result_key(target_url: str, feature: Dict[str, Any]) -> str:
+    """功能点在历史中的键：目标URL + 功能点指纹（功能点id每次发现都会变化，不能作为键）"""
+    fingerprint = feature_fingerprint(FeaturePoint.from_dict(feature))
+    return hashlib.md5(f"{target_url}_{fingerprint}".encode()).hexdigest()
+
+
+def summarize_report(report: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """将报告中的测试结果整理为 {键: 结果}"""
+    target_url = report.get("target_url") or ""
+    results = {}
+    for entry in report.get("test_details", []):
+        feature = entry["feature"]
+        results[result_key(target_url, feature)] = {
+            "description": feature["description"],
+            "category": feature["category"],
+            "status": entry["status"],
+            "wall_seconds": entry["details"].get("metrics", {}).get("wall_seconds"),
+        }
+    return results
+
+
+def untested_keys(report: Dict[str, Any]) -> set:
+    """报告中发现了但本次没有测试（跳过、隔离、取消）的功能点键"""
+    target_url = report.get("target_url") or ""
+    return {
+        result_key(target_url, feature)
+        for name in ("skipped_features", "quarantined_features", "cancelled_features")
+        for feature in report.get(name, [])
+    }
+
+
+def diff_reports(base: Dict[str, Any], head: Dict[str, Any],
+                 flaky: Optional[Dict[str, Dict[str, Any]]] = None,
+                 timing_threshold: float = 0.5, min_seconds: float = 5.0) -> Dict[str, Any]:
+    """对比两次运行的报告
+    
+    耗时增加超过timing_threshold（比例）且超过min_seconds（秒）记为耗时回归。
+    flaky为ReportHistory.flaky_features()的结果，不稳定功能点的状态变化单独列出，
+    不计入新增失败/新增通过。
+    """
+    flaky = flaky or {}
+    base_results = summarize_report(base)
+    head_results = summarize_report(head)
+    
+    diff = {
+        "base": base.get("start_time"),
+        "head": head.get("start_time"),
+        "newly_failing": [],
+        "newly_passing": [],
+        "still_failing": [],
+        "added": [],
+        "removed": [],
+        "timing_regressions": [],
+        "flaky": [dict(item, key=key) for key, item in flaky.items() if key in head_results],
+    }
+    
+    for key, result in head_results.items():
+        item = {"key": key, "description": result["description"], "category": result["category"]}
+        previous = base_results.get(key)
+        if previous is None:
+            diff["added"].append(dict(item, status=result["status"]))
+            continue
+        
+        if previous["status"] != result["status"] and key not in flaky:
+            bucket = "newly_failing" if result["status"] == "failed" else "newly_passing"
+            diff[bucket].append(item)
+        elif result["status"] == "failed":
+            diff["still_failing"].append(item)
+        
+        before, after = previous["wall_seconds"], result["wall_seconds"]
+        if before and after and after - before >= min_seconds and after >= before * (1 + timing_threshold):
+            diff["timing_regressions"].append(dict(item, before=before, after=after))
+    
+    # 本次被跳过、隔离或取消的功能点只是没有测试，不算消失
+    untested = untested_keys(head)
+    diff["removed"] = [
+        {"key": key, "description": result["description"], "category": result["category"]}
+        for key, result in base_results.items() if key not in head_results and key not in untested
+    ]
+    diff["timing_regressions"].sort(key=lambda item: item["after"] - item["before"], reverse=True)
+    return diff
+
+
+def print_diff(diff: Dict[str, Any]):
+    """打印对比结果"""
+    print(f"\n{'='*60}")
+    print(f"运行对比: {diff['base']} → {diff['head']}")
+    print(f"{'='*60}")
+    
+    sections = [
+        ("newly_failing", "新增失败"),
+        ("newly_passing", "新增通过"),
+        ("still_failing", "持续失败"),
+        ("flaky", "不稳定"),
+        ("added", "新功能点"),
+        ("removed", "已消失"),
+    ]
+    for key, label in sections:
+        print(f"{label}: {len(diff[key])}个")
+        for item in diff[key]:
+            print(f"  - {item['description']} ({item['category']})")
+    
+    print(f"耗时回归: {len(diff['timing_regressions'])}个")
+    for item in diff["timing_regressions"]:
+        print(f"  - {item['description']}: {item['before']}s → {item['after']}s")
+
+
+class ReportHistory:
+    """报告历史存储
+    
+    每次运行结束后调用record()保存报告并更新索引；索引按功能点键记录每次运行的
+    状态和耗时，因此检测不稳定功能点和对比运行都不需要重新读取旧报告。
+    每个目标只保留最近max_runs次运行，更早的运行会被删除（批量模式共享一个历史目录，按目标分别计数）。
+    record()写入前会重新读取索引，多个实例写同一个历史目录时不会覆盖彼此的记录。
+    """
+    
+    def __init__(self, root: str = "./report_history", max_runs: int = 50):
+        self.root = root
+        self.max_runs = max_runs
+        self.index_file = os.path.join(root, "index.json")
+        self.index = {"runs": [], "features": {}}
+        self._load_index()
+    
+    def record(self, report: Dict[str, Any]) -> str:
+        """保存一次运行的报告，返回run_id"""
+        self._load_index()
+        target_url = report.get("target_url") or ""
+        run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{hashlib.md5(target_url.encode()).hexdigest()[:8]}"
+        
+        os.makedirs(os.path.join(self.root, "runs"), exist_ok=True)
+        with open(self._run_file(run_id), 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        
+        self.index["runs"].append({
+            "run_id": run_id,
+            "target_url": target_url,
+            "start_time": report.get("start_time"),
+            "passed_tests": report.get("passed_tests", 0),
+            "failed_tests": report.get("failed_tests", 0),
+        })
+        for key, result in summarize_report(report).items():
+            entry = self.index["features"].setdefault(key, {
+                "description": result["description"],
+                "category": result["category"],
+                "target_url": target_url,
+                "results": [],
+            })
+            entry["results"].append({
+                "run_id": run_id,
+                "status": result["status"],
+                "wall_seconds": result["wall_seconds"],
+            })
+        
+        self._prune()
+        self._save_index()
+        return run_id
+    
+    def runs(self, target_url: Optional[str] = None) -> List[Dict[str, Any]]:
+        """运行列表（从旧到新），可按目标过滤"""
+        return [run for run in self.index["runs"] if target_url is None or run["target_url"] == target_url]
+    
+    def load_run(self, run_id: str) -> Dict[str, Any]:
+        """读取一次运行的完整报告"""
+        with open(self._run_file(run_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def flaky_features(self, target_url: Optional[str] = None, window: int = 5) -> Dict[str, Dict[str, Any]]:
+        """最近window次运行中既通过过又失败过的功能点，返回 {键: 统计}"""
+        recent = {run["run_id"] for run in self.runs(target_url)[-window:]}
+        flaky = {}
+        for key, entry in self.index["features"].items():
+            statuses = [r["status"] for r in entry["results"] if r["run_id"] in recent]
+            if "passed" not in statuses or "failed" not in statuses:
+                continue
+            flips = sum(1 for a, b in zip(statuses, statuses[1:]) if a != b)
+            flaky[key] = {
+                "description": entry["description"],
+                "category": entry["category"],
+                "runs": len(statuses),
+                "pass_rate": round(statuses.count("passed") / len(statuses), 2),
+                "flips": flips,
+            }
+        return flaky
+    
+    def diff_last(self, target_url: Optional[str] = None, window: int = 5) -> Optional[Dict[str, Any]]:
+        """对比目标最近两次运行，不足两次时返回None"""
+        runs = self.runs(target_url)
+        if len(runs) < 2:
+            return None
+        return diff_reports(
+            self.load_run(runs[-2]["run_id"]),
+            self.load_run(runs[-1]["run_id"]),
+            flaky=self.flaky_features(target_url, window),
+        )
+    
+    def _prune(self):
+        """删除每个目标超出max_runs的最旧运行"""
+        if not self.max_runs:
+            return
+        
+        by_target: Dict[str, List[str]] = {}
+        for run in self.index["runs"]:
+            by_target.setdefault(run["target_url"], []).append(run["run_id"])
+        expired_ids = {run_id for run_ids in by_target.values() for run_id in run_ids[:-self.max_runs]}
+        if not expired_ids:
+            return
+        
+        self.index["runs"] = [run for run in self.index["runs"] if run["run_id"] not in expired_ids]
+        for run_id in expired_ids:
+            try:
+                os.remove(self._run_file(run_id))
+            except OSError:
+                pass
+        
+        for key in list(self.index["features"]):
+            entry = self.index["features"][key]
+            entry["results"] = [r for r in entry["results"] if r["run_id"] not in expired_ids]
+            if not entry["results"]:
+                del self.index["features"][key]
+    
+    def _load_index(self):
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+    
+    def _save_index(self):
+        tmp_file = f"{self.index_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+    
+    def _run_file(self, run_id: str) -> str:
+        return os.path.join(self.root, "runs", f"{run_id}.json")
@@ -0,0 +1,208 @@
+"""
+增量发现：通过HTTP预检判断页面自上次运行后是否变化
+
+依次使用sitemap.xml的lastmod、条件请求（ETag/Last-Modified → 304）和规范化DOM哈希，
+只有变化的页面才交给FeatureDiscovery（LLM Agent）重新发现，
+未变化页面的功能点直接从本地页面存储加载。
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin
+
+from .features import FeaturePoint
+
+# 每次请求都会变化、与页面功能无关的属性
+_VOLATILE_ATTRS = {"value", "nonce", "integrity", "style"}
+
+
+class _NormalizedDomParser(HTMLParser):
+    """将HTML规范化为标签、稳定属性和文本的序列
+    
+    忽略script/style/noscript内容、注释、空白差异、CSRF令牌等易变属性，
+    文本中的数字统一替换，数据行数或计数变化不会被当作页面变化。
+    """
+    
+    IGNORED_TAGS = {"script", "style", "noscript"}
+    
+    def __init__(self):
+        super().__init__()
+        self.tokens: List[str] = []
+        self._ignored_depth = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.IGNORED_TAGS:
+            self._ignored_depth += 1
+            return
+        stable = sorted(
+            f"{name}={value or ''}" for name, value in attrs
+            if name not in _VOLATILE_ATTRS and "csrf" not in name and "token" not in name
+        )
+        self.tokens.append(f"<{tag} {' '.join(stable)}>")
+    
+    def handle_endtag(self, tag):
+        if tag in self.IGNORED_TAGS:
+            self._ignored_depth = max(self._ignored_depth - 1, 0)
+            return
+        self.tokens.append(f"</{tag}>")
+    
+    def handle_data(self, data):
+        if self._ignored_depth:
+            return
+        text = re.sub(r"\s+", " ", data).strip()
+        if text:
+            self.tokens.append(re.sub(r"\d+", "0", text))
+
+
+def normalized_dom_hash(html: str) -> str:
+    """规范化DOM的哈希"""
+    parser = _NormalizedDomParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass
+    return hashlib.sha256("\n".join(parser.tokens).encode()).hexdigest()
+
+
+class PageChangeDetector:
+    """页面变化检测与本地页面存储
+    
+    存储文件记录每个页面上次的ETag、Last-Modified、sitemap lastmod、规范化DOM哈希、
+    布局区域和发现的功能点。
+    """
+    
+    def __init__(self, store_file: str = "page_store.json", timeout: float = 10):
+        self.store_file = store_file
+        self.timeout = timeout
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(store_file):
+            with open(store_file, 'r', encoding='utf-8') as f:
+                self.pages = json.load(f).get("pages", {})
+    
+    async def fetch_sitemap(self, base_url: str) -> Dict[str, str]:
+        """读取站点的sitemap.xml，返回 {URL: lastmod}；不存在或解析失败时返回空字典"""
+        status, body, _ = await self._request(urljoin(base_url, "/sitemap.xml"))
+        if status != 200 or not body:
+            return {}
+        
+        try:
+            root = ET.fromstring(body)
+        except ET.ParseError:
+            return {}
+        
+        lastmods = {}
+        for url in root.iter():
+            if not url.tag.endswith("url"):
+                continue
+            loc = next((child.text for child in url if child.tag.endswith("loc")), None)
+            lastmod = next((child.text for child in url if child.tag.endswith("lastmod")), None)
+            if loc and lastmod:
+                lastmods[loc.strip()] = lastmod.strip()
+        return lastmods
+    
+    async def check(self, url: str, sitemap_lastmod: Optional[str] = None) -> Dict[str, Any]:
+        """检查页面是否变化
+        
+        返回 {"changed", "reason", "html", "etag", "last_modified", "lastmod", "dom_hash"}，
+        reason为 new / sitemap / not_modified / dom_hash / changed / fetch_failed。
+        """
+        stored = self.pages.get(url)
+        result = {
+            "changed": True, "reason": "new", "html": "",
+            "etag": None, "last_modified": None, "lastmod": sitemap_lastmod, "dom_hash": None,
+        }
+        
+        # sitemap声明的lastmod未变化：不发请求
+        if stored and sitemap_lastmod and stored.get("lastmod") == sitemap_lastmod:
+            result.update(changed=False, reason="sitemap", etag=stored.get("etag"),
+                          last_modified=stored.get("last_modified"), dom_hash=stored.get("dom_hash"))
+            return result
+        
+        headers = {}
+        if stored and stored.get("etag"):
+            headers["If-None-Match"] = stored["etag"]
+        if stored and stored.get("last_modified"):
+            headers["If-Modified-Since"] = stored["last_modified"]
+        
+        status, body, response_headers = await self._request(url, headers)
+        if status == 304 and stored:
+            result.update(changed=False, reason="not_modified", etag=stored.get("etag"),
+                          last_modified=stored.get("last_modified"), dom_hash=stored.get("dom_hash"))
+            return result
+        
+        if status != 200:
+            result["reason"] = "fetch_failed" if stored else "new"
+            return result
+        
+        html = body.decode(response_headers.get("charset") or "utf-8", errors="replace")
+        result.update(
+            html=html,
+            etag=response_headers.get("etag"),
+            last_modified=response_headers.get("last-modified"),
+            dom_hash=normalized_dom_hash(html),
+        )
+        if stored:
+            unchanged = stored.get("dom_hash") == result["dom_hash"]
+            result.update(changed=not unchanged, reason="dom_hash" if unchanged else "changed")
+        return result
+    
+    def stored_features(self, url: str) -> List[FeaturePoint]:
+        """页面上次发现的功能点"""
+        return [FeaturePoint.from_dict(data) for data in self.pages.get(url, {}).get("features", [])]
+    
+    def stored_regions(self, url: str) -> List[Dict[str, Any]]:
+        """页面上次解析的布局区域"""
+        return self.pages.get(url, {}).get("regions", [])
+    
+    def record(self, url: str, check: Dict[str, Any], features: Optional[List[FeaturePoint]] = None,
+               regions: Optional[List[Dict[str, Any]]] = None):
+        """更新页面记录；features/regions为None时保留已存储的内容"""
+        stored = self.pages.setdefault(url, {"features": [], "regions": []})
+        stored.update(
+            etag=check["etag"],
+            last_modified=check["last_modified"],
+            lastmod=check["lastmod"],
+            dom_hash=check["dom_hash"],
+            checked_at=datetime.now().isoformat(),
+        )
+        if features is not None:
+            stored["features"] = [f.to_dict() for f in features]
+            stored["discovered_at"] = stored["checked_at"]
+        if regions is not None:
+            stored["regions"] = regions
+    
+    def save(self):
+        """写入页面存储"""
+        tmp_file = f"{self.store_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"pages": self.pages}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.store_file)
+    
+    async def _request(self, url: str, headers: Optional[Dict[str, str]] = None) -> tuple:
+        """在线程中发起GET请求，返回 (状态码, 响应体, 响应头)；网络错误时状态码为None"""
+        def _get():
+            request = urllib.request.Request(url, headers=headers or {})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response_headers = {
+                        "etag": response.headers.get("ETag"),
+                        "last-modified": response.headers.get("Last-Modified"),
+                        "charset": response.headers.get_content_charset(),
+                    }
+                    return response.status, response.read(), response_headers
+            except urllib.error.HTTPError as e:
+                return e.code, b"", {}
+            except Exception:
+                return None, b"", {}
+        
+        return await asyncio.get_running_loop().run_in_executor(None, _get)
@@ -0,0 +1,86 @@
+"""
+按浏览器缓存页面导航状态
+
+同一个浏览器连续测试多个功能点时，如果上一个功能点结束时浏览器已经停留在
+目标页面，下一个功能点的任务就不再要求Agent重新访问；只有登录测试通过后
+才认为浏览器已登录，此时也不再要求重新登录。
+"""
+
+from typing import Any, Dict, List, Optional
+from urllib.parse import urldefrag, urlsplit
+
+
+def normalize_url(url: str) -> str:
+    """去掉片段和末尾斜杠，用于比较两个URL是否指向同一页面"""
+    return urldefrag(url or "")[0].rstrip("/")
+
+
+def url_origin(url: str) -> str:
+    """URL的源（scheme://host:port），登录身份只在同一个源内有效"""
+    parts = urlsplit(url or "")
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class NavigationCache:
+    """导航状态缓存：记录每个浏览器当前所在页面和登录身份，并统计节省的导航次数
+    
+    登录身份按源记录：批量模式下同一个浏览器会先后测试不同目标，
+    在一个站点上确认的登录不能带到另一个站点的任务中。
+    """
+    
+    def __init__(self):
+        # id(browser) -> {"url": 当前页面, "origin": 页面的源, "auth_user": 在该源上确认的登录身份（None表示未知）}
+        self.states: Dict[int, Dict[str, Any]] = {}
+        self.navigations = 0
+        self.reused = 0
+        self.navigation_seconds: List[float] = []
+    
+    def can_reuse(self, browser: Any, url: str, auth_user: Optional[str]) -> bool:
+        """浏览器是否已经在目标页面，且没有以其他身份登录（登录状态未知时也可以复用页面）"""
+        state = self.states.get(id(browser))
+        return (
+            state is not None
+            and normalize_url(state["url"]) == normalize_url(url)
+            and state["auth_user"] in (None, auth_user)
+        )
+    
+    def logged_in_as(self, browser: Any, url: str) -> Optional[str]:
+        """浏览器在url所在的源上确认登录的身份，未确认或浏览器停留在其他源时返回None"""
+        state = self.states.get(id(browser))
+        if state is None or state["origin"] != url_origin(url):
+            return None
+        return state["auth_user"]
+    
+    def record_start(self, reused: bool):
+        """记录一次功能点测试是复用了页面还是重新导航"""
+        if reused:
+            self.reused += 1
+        else:
+            self.navigations += 1
+    
+    def record_navigation_time(self, seconds: Optional[float]):
+        """记录一次重新导航的耗时（Agent第一步的时长），用于估算节省的时间"""
+        if seconds is not None:
+            self.navigation_seconds.append(seconds)
+    
+    def update(self, browser: Any, url: Optional[str], auth_user: Optional[str]):
+        """功能点测试结束后更新浏览器的页面状态；url未知时清除状态"""
+        if url:
+            self.states[id(browser)] = {"url": url, "origin": url_origin(url), "auth_user": auth_user}
+        else:
+            self.invalidate(browser)
+    
+    def invalidate(self, browser: Any):
+        """清除浏览器的页面状态，下次必须重新导航"""
+        self.states.pop(id(browser), None)
+    
+    def stats(self) -> Dict[str, Any]:
+        """导航缓存统计"""
+        average = (sum(self.navigation_seconds) / len(self.navigation_seconds)
+                   if self.navigation_seconds else None)
+        return {
+            "navigations": self.navigations,
+            "reused_pages": self.reused,
+            "average_navigation_seconds": round(average, 2) if average is not None else None,
+            "estimated_seconds_saved": round(average * self.reused, 1) if average is not None else None,
+        }
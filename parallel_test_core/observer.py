@@ -0,0 +1,262 @@
+"""
+网络与控制台观察器：不调用LLM、确定性地验证功能点测试结果
+
+观察器通过CDP订阅浏览器的Network/Runtime事件，记录功能点测试期间的请求、状态码、
+重定向、Set-Cookie、页面脚本的console.error和未捕获异常，然后按分类的声明式规则判断是否通过。
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# 分类 -> 验证规则；"*" 中的规则对所有分类生效，"分类.动作" 中的规则只对该动作的功能点生效
+# （认证类按动作区分：登出、切换账号不一定发POST或设置Cookie，只有登录才要求）
+#   request:    至少一个请求匹配 method/status/resource_type
+#   no_request: 没有任何请求匹配 method/status/resource_type
+#   cookie_set: 至少一个响应设置了Cookie
+#   no_js_errors: 页面脚本没有调用console.error、没有抛出未捕获的异常
+CATEGORY_CHECKS: Dict[str, List[Dict[str, str]]] = {
+    "*": [
+        {"check": "no_js_errors"},
+        {"check": "no_request", "status": "5xx"},
+    ],
+    "auth.login": [
+        {"check": "request", "method": "POST", "status": "2xx|3xx"},
+        {"check": "cookie_set"},
+    ],
+    "auth.register": [
+        {"check": "request", "method": "POST", "status": "2xx|3xx"},
+    ],
+    "navigation": [
+        {"check": "no_request", "resource_type": "document", "status": "4xx|5xx"},
+    ],
+    "data_entry": [
+        {"check": "request", "method": "POST|PUT|PATCH", "status": "2xx|3xx"},
+    ],
+}
+
+
+def _status_matches(status: Optional[int], pattern: str) -> bool:
+    """状态码匹配，pattern形如 "2xx|3xx" 或 "404" """
+    if status is None:
+        return False
+    for part in pattern.split("|"):
+        part = part.strip().lower()
+        if part.endswith("xx") and str(status)[:1] == part[:1]:
+            return True
+        if part == str(status):
+            return True
+    return False
+
+
+def _request_matches(entry: Dict[str, Any], rule: Dict[str, str]) -> bool:
+    if "method" in rule and entry["method"].upper() not in rule["method"].upper().split("|"):
+        return False
+    if "resource_type" in rule and entry["resource_type"] != rule["resource_type"]:
+        return False
+    if "status" in rule and not _status_matches(entry["status"], rule["status"]):
+        return False
+    return True
+
+
+class NetworkObserver:
+    """通过CDP记录浏览器中的网络请求和页面脚本错误
+    
+    使用一条独立的CDP连接（cdp_use每个事件只保留一个回调，注册在browser_use的连接上
+    会覆盖它自己的处理函数），附加到所有页面标签页并开启Network/Runtime域。
+    事件处理函数按CDP事件参数（字典）编写，每个功能点开始前调用reset()开启新的观察窗口。
+    network=False时只开启Runtime域，记录控制台错误作为证据，不记录网络请求。
+    """
+    
+    def __init__(self, network: bool = True):
+        self.network = network
+        self.attached = False
+        self.client = None
+        self.sessions: Dict[str, str] = {}  # 标签页targetId -> 观察连接上的会话ID
+        self._tasks: set = set()
+        self.reset()
+    
+    def reset(self):
+        """清空记录，开始新的观察窗口"""
+        self.requests: List[Dict[str, Any]] = []
+        self.console_errors: List[str] = []
+        self.page_errors: List[str] = []
+        self.cookies_set = 0
+        self._pending: Dict[tuple, Dict[str, Any]] = {}
+    
+    async def attach(self, browser: Any) -> bool:
+        """连接到browser_use会话所在浏览器的CDP端点并订阅事件，浏览器未启动或不支持CDP时返回False"""
+        try:
+            root = browser.cdp_client
+            from cdp_use import CDPClient
+        except Exception:
+            return False
+        
+        self.client = CDPClient(root.url, additional_headers=getattr(root, "additional_headers", None))
+        try:
+            await self.client.start()
+            register = self.client.register
+            register.Network.requestWillBeSent(self.on_request)
+            register.Network.responseReceived(self.on_response)
+            register.Network.responseReceivedExtraInfo(self.on_response_headers)
+            register.Runtime.consoleAPICalled(self.on_console)
+            register.Runtime.exceptionThrown(self.on_exception)
+            register.Target.targetCreated(self.on_target_created)
+            await self.client.send.Target.setDiscoverTargets(params={"discover": True})
+            
+            targets = await self.client.send.Target.getTargets()
+            for info in targets.get("targetInfos", []):
+                await self._observe(info)
+        except Exception:
+            await self.detach()
+            return False
+        
+        self.attached = True
+        return True
+    
+    async def enable_network(self):
+        """在已附加的标签页上补开Network域（只记录控制台的观察器升级为完整观察器）"""
+        if self.network:
+            return
+        self.network = True
+        if self.client is not None:
+            await asyncio.gather(*(
+                self.client.send.Network.enable(session_id=session_id)
+                for session_id in self.sessions.values()
+            ))
+    
+    async def detach(self):
+        """关闭观察连接（在关闭浏览器之前调用）"""
+        for task in self._tasks:
+            task.cancel()
+        client, self.client = self.client, None
+        self.attached = False
+        if client is not None:
+            try:
+                await client.stop()
+            except Exception:
+                pass
+    
+    async def _observe(self, info: Dict[str, Any]):
+        """附加到页面标签页，开启Network/Runtime事件"""
+        target_id = info.get("targetId")
+        if info.get("type") != "page" or target_id in self.sessions or self.client is None:
+            return
+        result = await self.client.send.Target.attachToTarget(params={"targetId": target_id, "flatten": True})
+        session_id = result["sessionId"]
+        self.sessions[target_id] = session_id
+        domains = [self.client.send.Runtime.enable(session_id=session_id)]
+        if self.network:
+            domains.append(self.client.send.Network.enable(session_id=session_id))
+        await asyncio.gather(*domains)
+    
+    def on_target_created(self, event: Dict[str, Any], session_id: Optional[str] = None):
+        # 事件回调在CDP消息循环中执行，不能在这里等待命令的响应，放到后台任务中附加
+        task = asyncio.ensure_future(self._observe(event.get("targetInfo", {})))
+        self._tasks.add(task)
+        task.add_done_callback(self._observed)
+    
+    def _observed(self, task: asyncio.Future):
+        self._tasks.discard(task)
+        if not task.cancelled():
+            task.exception()  # 标签页可能在附加前就已关闭
+    
+    def on_request(self, event: Dict[str, Any], session_id: Optional[str] = None):
+        key = (session_id, event.get("requestId"))
+        redirected_from = None
+        redirect = event.get("redirectResponse")
+        if redirect is not None and key in self._pending:
+            # 重定向沿用同一个requestId：上一跳以重定向响应结束
+            previous = self._pending.pop(key)
+            previous["status"] = redirect.get("status")
+            redirected_from = previous["url"]
+        
+        request = event.get("request", {})
+        entry = {
+            "started": datetime.now().isoformat(),
+            "method": request.get("method", "GET"),
+            "url": request.get("url", ""),
+            "resource_type": (event.get("type") or "").lower(),
+            "redirected_from": redirected_from,
+            "status": None,
+        }
+        self._pending[key] = entry
+        self.requests.append(entry)
+    
+    def on_response(self, event: Dict[str, Any], session_id: Optional[str] = None):
+        entry = self._pending.pop((session_id, event.get("requestId")), None)
+        if entry is not None:
+            entry["status"] = event.get("response", {}).get("status")
+    
+    def on_response_headers(self, event: Dict[str, Any], session_id: Optional[str] = None):
+        # responseReceived中的headers不含Set-Cookie，原始响应头只在ExtraInfo事件中
+        headers = event.get("headers") or {}
+        if any(name.lower() == "set-cookie" for name in headers):
+            self.cookies_set += 1
+    
+    def on_console(self, event: Dict[str, Any], session_id: Optional[str] = None):
+        # 只有页面脚本调用console.error才会产生该事件；浏览器自身的日志
+        # （例如子资源404的"Failed to load resource"）属于Log域，不计入
+        if event.get("type") != "error":
+            return
+        values = [
+            str(arg.get("value", arg.get("description", arg.get("type", ""))))
+            for arg in event.get("args", [])
+        ]
+        self.console_errors.append(" ".join(values))
+    
+    def on_exception(self, event: Dict[str, Any], session_id: Optional[str] = None):
+        details = event.get("exceptionDetails", {})
+        self.page_errors.append(details.get("exception", {}).get("description") or details.get("text", ""))
+    
+    def verify(self, category: str, action: Optional[str] = None) -> Dict[str, Any]:
+        """按分类（及动作，如认证类的login/logout）规则验证当前观察窗口"""
+        rules = CATEGORY_CHECKS["*"] + CATEGORY_CHECKS.get(category, [])
+        if action:
+            rules = rules + CATEGORY_CHECKS.get(f"{category}.{action}", [])
+        
+        checks = []
+        for rule in rules:
+            passed, detail = self._evaluate(rule)
+            checks.append({"rule": rule, "passed": passed, "detail": detail})
+        
+        return {"passed": all(c["passed"] for c in checks), "checks": checks}
+    
+    def _evaluate(self, rule: Dict[str, str]):
+        kind = rule["check"]
+        if kind == "request":
+            matched = [e for e in self.requests if _request_matches(e, rule)]
+            return bool(matched), f"{len(matched)}个匹配请求"
+        if kind == "no_request":
+            matched = [e for e in self.requests if _request_matches(e, rule)]
+            return not matched, "; ".join(f"{e['status']} {e['method']} {e['url']}" for e in matched[:3])
+        if kind == "cookie_set":
+            return self.cookies_set > 0, f"{self.cookies_set}个响应设置了Cookie"
+        if kind == "no_js_errors":
+            errors = self.console_errors + self.page_errors
+            return not errors, "; ".join(errors[:3])
+        return False, f"未知规则: {kind}"
+    
+    def console_log(self) -> Dict[str, List[str]]:
+        """控制台日志（作为测试证据）"""
+        return {"console_errors": list(self.console_errors), "page_errors": list(self.page_errors)}
+    
+    def to_har(self) -> Dict[str, Any]:
+        """把请求记录转换为精简的HAR 1.2结构（作为测试证据）"""
+        return {
+            "log": {
+                "version": "1.2",
+                "creator": {"name": "parallel_test_core", "version": "1.0"},
+                "entries": [
+                    {
+                        "startedDateTime": entry["started"],
+                        "request": {"method": entry["method"], "url": entry["url"]},
+                        "response": {"status": entry["status"] if entry["status"] is not None else 0,
+                                     "redirectURL": ""},
+                        "_resourceType": entry["resource_type"],
+                        "_redirectedFrom": entry["redirected_from"],
+                    }
+                    for entry in self.requests
+                ],
+            }
+        }
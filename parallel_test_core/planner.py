@@ -0,0 +1,131 @@
+"""
+规划模式（--plan-only）：不执行测试，用离散事件模拟预测阶段4的耗时
+
+模拟直接复用PriorityScheduler的派发逻辑，只是把真实的Agent执行替换为
+按分类估计的耗时，因此预测结果与实际调度行为一致。
+"""
+
+import heapq
+import json
+from typing import List, Dict, Any, Optional
+
+from .config import ParallelTestConfig
+from .features import FeaturePoint, FeatureDeduplicator, TaskAllocator, load_features, save_features
+from .scheduling import PriorityScheduler
+
+# 各分类单个功能点的默认耗时估计（秒）
+DEFAULT_CATEGORY_COSTS = {
+    "auth": 90.0,
+    "navigation": 45.0,
+    "data_entry": 120.0,
+    "interaction": 60.0,
+    "display": 40.0,
+}
+DEFAULT_FEATURE_COST = 60.0
+
+
+def load_category_costs(report_path: str) -> Dict[str, float]:
+    """从以往的V2测试报告读取各分类的实测平均耗时，缺失的分类使用默认估计"""
+    costs = dict(DEFAULT_CATEGORY_COSTS)
+    with open(report_path, 'r', encoding='utf-8') as f:
+        costs.update(json.load(f).get("category_costs", {}))
+    return costs
+
+
+def simulate(allocations: List[Dict[str, Any]], costs: Dict[str, float],
+             time_budget: Optional[float] = None) -> Dict[str, Any]:
+    """离散事件模拟：每个分配对应一个Agent，按PriorityScheduler的顺序派发功能点"""
+    scheduler = PriorityScheduler(allocations)
+    agent_ids = [alloc["agent_id"] for alloc in allocations]
+    busy = dict.fromkeys(agent_ids, 0.0)
+    makespan = 0.0
+    
+    # 事件队列：(Agent空闲时刻, Agent序号)
+    events = [(0.0, i) for i in range(len(agent_ids))]
+    heapq.heapify(events)
+    
+    while events:
+        now, index = heapq.heappop(events)
+        if time_budget is not None and now >= time_budget:
+            continue
+        
+        feature = scheduler.next_feature(agent_ids[index])
+        if feature is None:
+            continue
+        
+        cost = costs.get(feature.category, DEFAULT_FEATURE_COST)
+        scheduler.mark_done(feature)
+        busy[agent_ids[index]] += cost
+        makespan = max(makespan, now + cost)
+        heapq.heappush(events, (now + cost, index))
+    
+    skipped = scheduler.pending_count()
+    
+    return {
+        "agents": len(agent_ids),
+        "makespan_seconds": round(makespan, 1),
+        "total_work_seconds": round(sum(busy.values()), 1),
+        "utilization": {
+            agent_id: round(seconds / makespan, 3) if makespan else 0.0
+            for agent_id, seconds in busy.items()
+        },
+        "skipped": skipped,
+    }
+
+
+def recommend_agent_count(features: List[FeaturePoint], costs: Dict[str, float],
+                          max_agents: int = 10, tolerance: float = 0.05) -> Dict[str, Any]:
+    """对1..max_agents个Agent分别模拟，推荐makespan与最优值相差不超过tolerance的最少Agent数"""
+    results = []
+    for num_agents in range(1, max_agents + 1):
+        allocations = TaskAllocator(num_agents).allocate(features, verbose=False)
+        result = simulate(allocations, costs)
+        result["num_parallel_agents"] = num_agents
+        results.append(result)
+    
+    best = min(r["makespan_seconds"] for r in results)
+    recommended = next(r for r in results if r["makespan_seconds"] <= best * (1 + tolerance))
+    
+    return {"recommended": recommended["num_parallel_agents"], "results": results}
+
+
+async def run_plan_only(config: ParallelTestConfig, features_file: Optional[str] = None,
+                  costs_file: Optional[str] = None, max_agents: int = 10,
+                  cache_file: str = "feature_cache.json") -> Dict[str, Any]:
+    """规划模式：加载或发现功能点 → 去重 → 分配 → 模拟，并打印预测结果
+    
+    未提供features_file时执行真实的功能点发现（会消耗LLM），结果写入cache_file，
+    之后可以用 --features 复用。
+    """
+    if features_file:
+        features = load_features(features_file)
+        print(f"从 {features_file} 加载 {len(features)} 个功能点")
+    else:
+        from .engine import ParallelWebsiteTestAgentV2
+        
+        features = await ParallelWebsiteTestAgentV2(config).discover_features()
+        save_features(cache_file, features)
+        print(f"功能点已缓存到: {cache_file}")
+    
+    costs = load_category_costs(costs_file) if costs_file else dict(DEFAULT_CATEGORY_COSTS)
+    
+    unique_features = FeatureDeduplicator().deduplicate(features)
+    allocations = TaskAllocator(config.num_parallel_agents).allocate(unique_features)
+    result = simulate(allocations, costs, time_budget=config.time_budget)
+    recommendation = recommend_agent_count(unique_features, costs, max_agents=max_agents)
+    
+    print(f"\n{'='*60}")
+    print(f"规划结果（{config.num_parallel_agents}个Agent，实际启动{result['agents']}个）")
+    print(f"{'='*60}\n")
+    print(f"预测总耗时: {result['makespan_seconds']}s（总工作量 {result['total_work_seconds']}s）")
+    for agent_id, utilization in result["utilization"].items():
+        print(f"  {agent_id}: 利用率 {utilization:.0%}")
+    if result["skipped"]:
+        print(f"墙钟预算内无法完成，预计跳过 {result['skipped']} 个功能点")
+    
+    print("\nAgent数量 vs 预测总耗时：")
+    for item in recommendation["results"]:
+        marker = "  ← 推荐" if item["num_parallel_agents"] == recommendation["recommended"] else ""
+        print(f"  {item['num_parallel_agents']:>2}个Agent: {item['makespan_seconds']}s{marker}")
+    
+    return {"simulation": result, "recommendation": recommendation}
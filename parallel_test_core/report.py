@@ -0,0 +1,221 @@
+"""
+测试报告记录器
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from typing import List, Dict, Any
+
+from .features import FeaturePoint
+
+
+class BaseTestLogger:
+    """测试日志记录器基类：并发安全地累计测试结果，并保存为JSON报告"""
+    
+    # 记录测试总数的字段名
+    count_key = "total_tests"
+    
+    def __init__(self, output_file: str, **extra_fields):
+        self.output_file = output_file
+        self.test_results = {
+            "start_time": datetime.now().isoformat(),
+            "end_time": None,
+            "target_url": None,
+            self.count_key: 0,
+            "passed_tests": 0,
+            "failed_tests": 0,
+            "test_details": [],
+            **extra_fields
+        }
+        self.lock = asyncio.Lock()
+    
+    async def _record(self, test_entry: Dict[str, Any], line: str):
+        """记录单条测试结果并实时打印"""
+        async with self.lock:
+            self.test_results[self.count_key] += 1
+            if test_entry["status"] == "passed":
+                self.test_results["passed_tests"] += 1
+            else:
+                self.test_results["failed_tests"] += 1
+            
+            self.test_results["test_details"].append(test_entry)
+            
+            print(line)
+    
+    def save_report(self):
+        """保存测试报告"""
+        self.test_results["end_time"] = datetime.now().isoformat()
+        self._before_save()
+        with open(self.output_file, 'w', encoding='utf-8') as f:
+            json.dump(self.test_results, f, ensure_ascii=False, indent=2)
+        
+        print(f"\n{'='*60}")
+        print(f"测试报告已保存到: {self.output_file}")
+        self._print_summary()
+        print(f"{'='*60}")
+    
+    def _before_save(self):
+        """保存前的汇总钩子"""
+    
+    def _print_summary(self):
+        print(f"总测试数: {self.test_results[self.count_key]}")
+        print(f"通过: {self.test_results['passed_tests']}")
+        print(f"失败: {self.test_results['failed_tests']}")
+
+
+class TaskTestLogger(BaseTestLogger):
+    """按测试任务记录的日志记录器（V1固定任务）"""
+    
+    def __init__(self, output_file: str = "parallel_test_report.json"):
+        super().__init__(output_file)
+    
+    async def log_test(self, agent_id: str, test_type: str, description: str, 
+                      status: str, details: Dict = None):
+        """记录单个测试（线程安全）"""
+        await self._record(
+            {
+                "timestamp": datetime.now().isoformat(),
+                "agent_id": agent_id,
+                "type": test_type,
+                "description": description,
+                "status": status,
+                "details": details or {}
+            },
+            f"[{agent_id}] [{status.upper()}] {test_type}: {description}"
+        )
+
+
+class TestLogger(BaseTestLogger):
+    """测试日志记录器（V2功能点）"""
+    
+    count_key = "tested_features"
+    
+    def __init__(self, output_file: str = "parallel_test_report_v2.json"):
+        super().__init__(
+            output_file,
+            total_features=0,
+            skipped_tests=0,
+            discovered_features=[],
+            skipped_features=[],
+            quarantined_features=[],
+            cancelled_features=[],
+            interrupted=False,
+            agent_metrics={},
+            most_expensive_features=[],
+            category_costs={},
+            navigation_cache={}
+        )
+    
+    async def log_test(self, agent_id: str, feature: FeaturePoint, 
+                      status: str, details: Dict = None):
+        """记录单个测试"""
+        await self._record(
+            {
+                "timestamp": datetime.now().isoformat(),
+                "agent_id": agent_id,
+                "feature": feature.to_dict(),
+                "status": status,
+                "details": details or {}
+            },
+            f"[{agent_id}] [{status.upper()}] {feature.description}"
+        )
+    
+    def log_skipped(self, features: List[FeaturePoint]):
+        """记录因预算耗尽或中断而跳过的功能点"""
+        self.test_results["skipped_tests"] += len(features)
+        self.test_results["skipped_features"].extend(f.to_dict() for f in features)
+        
+        for feature in features:
+            print(f"[SKIPPED] {feature.description} (priority={feature.priority})")
+    
+    def log_cancelled(self, features: List[FeaturePoint]):
+        """记录中断时宽限期内未完成、被取消的功能点"""
+        self.test_results["interrupted"] = True
+        self.test_results["cancelled_features"].extend(f.to_dict() for f in features)
+        
+        for feature in features:
+            print(f"[CANCELLED] {feature.description}")
+    
+    def log_quarantined(self, features: List[FeaturePoint]):
+        """记录因不稳定而被隔离、本次未测试的功能点"""
+        self.test_results["quarantined_features"].extend(f.to_dict() for f in features)
+        
+        for feature in features:
+            print(f"[QUARANTINED] {feature.description}")
+    
+    def set_discovered_features(self, features: List[FeaturePoint]):
+        """设置发现的功能点"""
+        self.test_results["total_features"] = len(features)
+        self.test_results["discovered_features"] = [f.to_dict() for f in features]
+    
+    def summarize_metrics(self, top_n: int = 5):
+        """汇总各Agent的步骤/token统计、最昂贵的功能点和各分类平均耗时"""
+        numeric_keys = ["steps", "llm_calls", "input_tokens", "output_tokens",
+                        "llm_seconds", "browser_seconds", "wall_seconds", "retries"]
+        agent_metrics: Dict[str, Dict[str, Any]] = {}
+        category_totals: Dict[str, List[float]] = {}
+        measured = []
+        
+        for entry in self.test_results["test_details"]:
+            metrics = entry["details"].get("metrics")
+            if not metrics:
+                continue
+            measured.append(entry)
+            
+            totals = agent_metrics.setdefault(entry["agent_id"], dict.fromkeys(numeric_keys, 0))
+            totals["features"] = totals.get("features", 0) + 1
+            for key in numeric_keys:
+                totals[key] = round(totals[key] + metrics.get(key, 0), 2)
+            
+            category_totals.setdefault(entry["feature"]["category"], []).append(metrics["wall_seconds"])
+        
+        measured.sort(
+            key=lambda e: (e["details"]["metrics"]["input_tokens"] + e["details"]["metrics"]["output_tokens"],
+                           e["details"]["metrics"]["wall_seconds"]),
+            reverse=True
+        )
+        
+        self.test_results["agent_metrics"] = agent_metrics
+        self.test_results["most_expensive_features"] = [
+            {
+                "agent_id": e["agent_id"],
+                "feature_id": e["feature"]["id"],
+                "description": e["feature"]["description"],
+                "category": e["feature"]["category"],
+                **e["details"]["metrics"],
+            }
+            for e in measured[:top_n]
+        ]
+        # 各分类平均耗时（秒），可作为后续调度/规划的成本估计
+        self.test_results["category_costs"] = {
+            category: round(sum(values) / len(values), 2)
+            for category, values in category_totals.items()
+        }
+    
+    def _before_save(self):
+        self.summarize_metrics()
+    
+    def _print_summary(self):
+        print(f"发现功能点: {self.test_results['total_features']}")
+        print(f"测试功能点: {self.test_results['tested_features']}")
+        print(f"通过: {self.test_results['passed_tests']}")
+        print(f"失败: {self.test_results['failed_tests']}")
+        print(f"跳过: {self.test_results['skipped_tests']}")
+        if self.test_results["interrupted"]:
+            print(f"已中断（部分报告），取消: {len(self.test_results['cancelled_features'])}")
+        if self.test_results["quarantined_features"]:
+            print(f"隔离（不稳定）: {len(self.test_results['quarantined_features'])}")
+        
+        navigation = self.test_results["navigation_cache"]
+        if navigation.get("reused_pages"):
+            saved = navigation["estimated_seconds_saved"]
+            print(f"页面复用: 节省{navigation['reused_pages']}次导航"
+                  + (f"，约{saved}s" if saved is not None else ""))
+        
+        if self.test_results["most_expensive_features"]:
+            print("最昂贵的功能点：")
+            for item in self.test_results["most_expensive_features"]:
+                print(f"  - {item['description']} [{item['agent_id']}]: "
+                      f"{item['input_tokens'] + item['output_tokens']} tokens, "
+                      f"{item['steps']}步, {item['wall_seconds']}s")
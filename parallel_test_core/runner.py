@@ -0,0 +1,200 @@
+"""
+Agent执行器与浏览器管理
+
+browser_use和dotenv只在第一次真正需要创建浏览器、LLM或Agent时才导入，
+因此CLI、--help、报告工具和规划阶段（去重、分配）不会加载Chromium和LLM客户端代码。
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .observer import NetworkObserver
+from .shutdown import ShutdownController, kill_orphaned_browsers
+
+_browser_use = None
+
+
+def load_browser_use():
+    """延迟导入browser_use（首次调用时同时加载.env）"""
+    global _browser_use
+    if _browser_use is None:
+        from dotenv import load_dotenv
+        import browser_use
+        
+        load_dotenv()
+        _browser_use = browser_use
+    return _browser_use
+
+
+class AgentRunner:
+    """默认Agent执行器：基于browser_use创建浏览器、LLM和Agent
+    
+    引擎只通过这个接口与浏览器/LLM交互，替换为子类即可接入其他执行后端
+    （例如离线演练或测试中的假执行器）。
+    """
+    
+    def __init__(self):
+        # id(browser) -> 网络观察器；None表示该浏览器不支持挂载观察器
+        self.observers: Dict[int, Optional[NetworkObserver]] = {}
+    
+    def create_llm(self):
+        """创建LLM客户端"""
+        return load_browser_use().ChatBrowserUse()
+    
+    def create_browser(self, user_data_dir: str, headless: bool = False):
+        """创建浏览器实例
+        
+        keep_alive让浏览器在多个Agent之间保持打开，固定的user_data_dir让
+        HTTP缓存、Service Worker和登录Cookie在多次运行之间持久保留。
+        """
+        return load_browser_use().Browser(user_data_dir=user_data_dir, headless=headless, keep_alive=True)
+    
+    async def capture_artifacts(self, browser) -> Dict[str, Any]:
+        """采集浏览器当前页面的证据（截图、HTML），浏览器不支持的类型会被跳过"""
+        artifacts: Dict[str, Any] = {}
+        take_screenshot = getattr(browser, "take_screenshot", None)
+        if take_screenshot is not None:
+            try:
+                artifacts["screenshot"] = await take_screenshot()
+            except Exception:
+                pass
+        
+        html = await self.page_html(browser)
+        if html:
+            artifacts["html"] = html
+        return artifacts
+    
+    async def observer_for(self, browser, network: bool = True) -> Optional[NetworkObserver]:
+        """返回通过CDP挂在浏览器上的观察器（每个浏览器只挂载一次），不支持时返回None
+        
+        network=False时只记录控制台；之后有目标需要网络验证时，同一个观察器再开启Network域。
+        """
+        if id(browser) in self.observers:
+            observer = self.observers[id(browser)]
+            if observer is not None and network:
+                await observer.enable_network()
+            return observer
+        
+        # CDP连接在浏览器启动后才存在，提前启动以便第一个功能点也能被观察（重复启动是安全的）
+        if hasattr(browser, "start"):
+            try:
+                await browser.start()
+            except Exception:
+                pass
+        
+        observer = NetworkObserver(network=network)
+        if not await observer.attach(browser):
+            print("浏览器不支持通过CDP挂载观察器，不采集控制台日志，测试结果只按Agent是否报错判断")
+            observer = None
+        self.observers[id(browser)] = observer
+        return observer
+    
+    async def detach_observers(self, browsers: List[Any]):
+        """关闭这些浏览器上的网络观察器连接"""
+        for browser in browsers:
+            observer = self.observers.pop(id(browser), None)
+            if observer is not None:
+                await observer.detach()
+    
+    async def current_url(self, browser) -> Optional[str]:
+        """浏览器当前页面URL，无法获取时返回None"""
+        get_url = getattr(browser, "get_current_page_url", None)
+        if get_url is None:
+            return None
+        try:
+            return await get_url()
+        except Exception:
+            return None
+    
+    async def page_html(self, browser) -> str:
+        """浏览器当前页面的HTML（渲染后的DOM），通过CDP在Agent当前标签页中读取，无法获取时返回空字符串"""
+        get_session = getattr(browser, "get_or_create_cdp_session", None)
+        if get_session is None:
+            return ""
+        try:
+            cdp_session = await get_session(focus=False)
+            result = await cdp_session.cdp_client.send.Runtime.evaluate(
+                params={"expression": "document.documentElement.outerHTML", "returnByValue": True},
+                session_id=cdp_session.session_id,
+            )
+            return result.get("result", {}).get("value") or ""
+        except Exception:
+            return ""
+    
+    async def run(self, task: str, llm=None, browser=None, **agent_kwargs) -> Any:
+        """创建Agent执行任务，返回Agent历史"""
+        agent = load_browser_use().Agent(
+            task=task,
+            llm=llm or self.create_llm(),
+            browser=browser,
+            **agent_kwargs
+        )
+        return await agent.run()
+
+
+def create_browsers(runner: AgentRunner, count: int, profile_prefix: str,
+                    headless: bool = False) -> List[Any]:
+    """创建多个独立的浏览器实例（每个实例使用独立的用户目录）"""
+    return [
+        runner.create_browser(user_data_dir=profile_dir, headless=headless)
+        for profile_dir in profile_dirs(profile_prefix, count)
+    ]
+
+
+def profile_dirs(profile_prefix: str, count: int) -> List[str]:
+    """create_browsers为count个浏览器使用的用户目录"""
+    return [f'{profile_prefix}-{i}' for i in range(count)]
+
+
+async def close_browsers(browsers: List[Any], timeout: Optional[float] = None,
+                         profile_prefix: Optional[str] = None) -> bool:
+    """并发关闭所有浏览器并结束其进程，忽略关闭时的错误
+    
+    浏览器以keep_alive=True创建，browser_use的close()/stop()不会结束浏览器进程，
+    因此优先调用kill()，不支持时退回close()。设置timeout后最多等待timeout秒，超时返回False。
+    给出profile_prefix时，关闭后（无论是否超时）结束仍在使用这些浏览器profile目录的残留进程。
+    """
+    async def _close(browser):
+        close = getattr(browser, "kill", None) or browser.close
+        try:
+            await close()
+        except Exception:
+            pass
+    
+    closed = True
+    try:
+        await asyncio.wait_for(asyncio.gather(*[_close(browser) for browser in browsers]), timeout)
+    except asyncio.TimeoutError:
+        print(f"关闭浏览器超时（{timeout}秒）")
+        closed = False
+    
+    if profile_prefix:
+        kill_orphaned_browsers(profile_dirs(profile_prefix, len(browsers)))
+    return closed
+
+
+async def run_with_browsers(runner: AgentRunner, count: int, profile_prefix: str,
+                            worker: Callable[[int, Any], Awaitable[Any]],
+                            headless: bool = False,
+                            browsers: Optional[List[Any]] = None,
+                            shutdown: Optional[ShutdownController] = None) -> List[Any]:
+    """为每个Worker分配一个浏览器并行运行，结束后清理浏览器
+    
+    worker(i, browser)的异常会作为结果返回（return_exceptions=True），
+    一个Worker失败不影响其他Worker。传入browsers时复用这些浏览器且不负责关闭。
+    传入shutdown时由其托管Worker：收到中断信号后等待宽限期，再取消剩余Worker。
+    """
+    owned = browsers is None
+    if owned:
+        browsers = create_browsers(runner, count, profile_prefix, headless)
+    
+    tasks = [asyncio.ensure_future(worker(i, browser)) for i, browser in enumerate(browsers)]
+    try:
+        if shutdown is not None:
+            return await shutdown.supervise(tasks)
+        return await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        if owned:
+            await runner.detach_observers(browsers)
+            timeout = shutdown.close_timeout if shutdown is not None else None
+            await close_browsers(browsers, timeout=timeout, profile_prefix=profile_prefix)
@@ -0,0 +1,248 @@
+"""
+阶段4的调度器：全局优先级队列、墙钟预算和多目标公平调度
+"""
+
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional
+
+from .features import FeaturePoint
+
+
+class PriorityScheduler:
+    """优先级调度器
+    
+    将所有Agent的功能点放入一个全局队列：priority数值越小越先派发，
+    任何Agent都不会在还有更高优先级功能点待测时去测低优先级功能点。
+    同优先级下优先派发分配给本Agent的功能点，否则从其他Agent处窃取。
+    
+    设置time_budget（秒）后，预算耗尽即停止派发新任务，
+    已在执行中的功能点会正常完成，剩余功能点记为跳过。
+    
+    队列清空后，空闲Agent可以通过next_speculative()为拖尾功能点领取一个推测执行副本，
+    副本总数不超过speculation_budget，每个功能点最多一个副本。只有只读的分类会被推测执行，
+    登录/登出、表单提交等有副作用的功能点执行两次会改变被测站点的状态。
+    """
+    
+    SPECULATIVE_CATEGORIES = {"navigation", "display"}
+    
+    def __init__(self, allocations: List[Dict[str, Any]], time_budget: Optional[float] = None,
+                 speculation_budget: int = 0, speculation_factor: float = 2.0):
+        self.time_budget = time_budget
+        self.speculation_budget = speculation_budget
+        self.speculation_factor = speculation_factor
+        self.speculated: List[FeaturePoint] = []
+        self.stopped = False
+        self.cancelled: List[FeaturePoint] = []
+        self.deadline: Optional[float] = None
+        # priority -> {agent_id: deque([feature, ...])}，保持分配顺序；
+        # 按所属Agent分队列，派发和窃取都是O(1)
+        self.pending: Dict[int, Dict[str, deque]] = {}
+        self._pending_count = 0
+        self.in_flight: Dict[str, FeaturePoint] = {}
+        self.running: Dict[str, tuple] = {}  # feature.id -> (agent_id, 开始时间)
+        self.completed: List[FeaturePoint] = []
+        self.skipped: List[FeaturePoint] = []
+        self.durations: List[float] = []
+        
+        for alloc in allocations:
+            for feature in alloc["features"]:
+                owners = self.pending.setdefault(feature.priority, {})
+                owners.setdefault(alloc["agent_id"], deque()).append(feature)
+                self._pending_count += 1
+    
+    def start(self):
+        """开始计时"""
+        if self.time_budget is not None:
+            self.deadline = time.monotonic() + self.time_budget
+    
+    def budget_exhausted(self) -> bool:
+        """墙钟预算是否耗尽（或已收到关闭请求）"""
+        return self.stopped or (self.deadline is not None and time.monotonic() >= self.deadline)
+    
+    def stop(self):
+        """停止派发：剩余功能点立即记为跳过，之后next_feature()返回None"""
+        self.stopped = True
+        self._skip_pending()
+    
+    def best_priority(self) -> Optional[int]:
+        """当前待派发功能点中的最高优先级（数值最小）"""
+        return min(self.pending, default=None)
+    
+    def pending_count(self) -> int:
+        """待派发的功能点数量"""
+        return self._pending_count
+    
+    def next_feature(self, agent_id: str) -> Optional[FeaturePoint]:
+        """为指定Agent取下一个功能点，无可派发任务时返回None"""
+        if self.budget_exhausted():
+            self._skip_pending()
+            return None
+        
+        priority = self.best_priority()
+        if priority is None:
+            return None
+        
+        # 空队列会被立即删除，因此这里的队列都非空；本Agent没有时从第一个Agent处窃取
+        owners = self.pending[priority]
+        owner = agent_id if agent_id in owners else next(iter(owners))
+        queue = owners[owner]
+        feature = queue.popleft()
+        if not queue:
+            del owners[owner]
+            if not owners:
+                del self.pending[priority]
+        self._pending_count -= 1
+        
+        self.in_flight[feature.id] = feature
+        self.running[feature.id] = (agent_id, time.monotonic())
+        return feature
+    
+    def can_speculate(self) -> bool:
+        """是否还可能派发推测执行副本"""
+        return len(self.speculated) < self.speculation_budget and not self.budget_exhausted()
+    
+    def next_speculative(self, agent_id: str, default_seconds: float = 60) -> Optional[FeaturePoint]:
+        """队列已空时，为空闲Agent取一个拖尾功能点的副本
+        
+        执行时间超过预期耗时（已完成功能点耗时的中位数，尚无完成时用default_seconds）
+        speculation_factor倍的只读功能点视为拖尾，取已执行时间最长的一个；没有时返回None。
+        """
+        if self.pending_count() or not self.can_speculate():
+            return None
+        
+        expected = sorted(self.durations)[len(self.durations) // 2] if self.durations else default_seconds
+        now = time.monotonic()
+        speculated_ids = {feature.id for feature in self.speculated}
+        stragglers = [
+            (now - started, self.in_flight[fid])
+            for fid, (owner, started) in self.running.items()
+            if owner != agent_id and fid not in speculated_ids
+            and self.in_flight[fid].category in self.SPECULATIVE_CATEGORIES
+            and now - started > expected * self.speculation_factor
+        ]
+        if not stragglers:
+            return None
+        
+        _, feature = max(stragglers, key=lambda item: item[0])
+        self.speculated.append(feature)
+        return feature
+    
+    def mark_done(self, feature: FeaturePoint):
+        """标记功能点测试完成"""
+        self.in_flight.pop(feature.id, None)
+        _, started = self.running.pop(feature.id, (None, None))
+        if started is not None:
+            self.durations.append(time.monotonic() - started)
+        self.completed.append(feature)
+    
+    def mark_cancelled(self, feature: FeaturePoint):
+        """标记功能点在执行中被取消（关闭时宽限期已过）"""
+        self.in_flight.pop(feature.id, None)
+        self.running.pop(feature.id, None)
+        self.cancelled.append(feature)
+    
+    def progress(self) -> Dict[str, Any]:
+        """当前进度快照（供ProgressDashboard使用）"""
+        now = time.monotonic()
+        return {
+            "pending": self.pending_count(),
+            "in_flight": [
+                {"agent_id": self.running[fid][0], "feature": feature.description,
+                 "elapsed": now - self.running[fid][1]}
+                for fid, feature in self.in_flight.items()
+            ],
+            "completed": len(self.completed),
+            "skipped": len(self.skipped),
+            "durations": list(self.durations),
+        }
+    
+    def _skip_pending(self):
+        """预算耗尽：将所有待派发功能点记为跳过"""
+        for priority in sorted(self.pending):
+            for queue in self.pending[priority].values():
+                self.skipped.extend(queue)
+        self.pending.clear()
+        self._pending_count = 0
+
+
+class FairShareScheduler:
+    """多目标公平调度器
+    
+    每个目标持有一个PriorityScheduler，所有Worker共享同一个全局队列：
+    先比较各目标的最高待测优先级，同优先级时派发给已派发数最少的目标，
+    保证一个功能点很多的目标不会饿死其他目标。
+    """
+    
+    def __init__(self, time_budget: Optional[float] = None):
+        self.time_budget = time_budget
+        self.deadline: Optional[float] = None
+        self.schedulers: Dict[str, PriorityScheduler] = {}
+        self.dispatched: Dict[str, int] = {}
+        self.stopped = False
+    
+    def add_target(self, target_name: str, allocations: List[Dict[str, Any]]):
+        """注册一个目标的任务分配"""
+        self.schedulers[target_name] = PriorityScheduler(allocations)
+        self.dispatched[target_name] = 0
+    
+    def start(self):
+        """开始计时"""
+        if self.time_budget is not None:
+            self.deadline = time.monotonic() + self.time_budget
+    
+    def budget_exhausted(self) -> bool:
+        """墙钟预算是否耗尽（或已收到关闭请求）"""
+        return self.stopped or (self.deadline is not None and time.monotonic() >= self.deadline)
+    
+    def stop(self):
+        """停止派发所有目标"""
+        self.stopped = True
+        for scheduler in self.schedulers.values():
+            scheduler.stop()
+    
+    def next_feature(self, agent_id: str) -> Optional[tuple]:
+        """为指定Worker取下一个 (目标名, 功能点)，无可派发任务时返回None"""
+        if self.budget_exhausted():
+            for scheduler in self.schedulers.values():
+                scheduler._skip_pending()
+            return None
+        
+        candidates = []
+        for name, scheduler in self.schedulers.items():
+            priority = scheduler.best_priority()
+            if priority is not None:
+                candidates.append((priority, self.dispatched[name], name))
+        if not candidates:
+            return None
+        
+        _, _, target_name = min(candidates)
+        feature = self.schedulers[target_name].next_feature(agent_id)
+        self.dispatched[target_name] += 1
+        return target_name, feature
+    
+    def mark_done(self, target_name: str, feature: FeaturePoint):
+        """标记功能点测试完成"""
+        self.schedulers[target_name].mark_done(feature)
+    
+    def mark_cancelled(self, target_name: str, feature: FeaturePoint):
+        """标记功能点在执行中被取消"""
+        self.schedulers[target_name].mark_cancelled(feature)
+    
+    def skipped(self, target_name: str) -> List[FeaturePoint]:
+        """指定目标中因预算耗尽而跳过的功能点"""
+        return self.schedulers[target_name].skipped
+    
+    def progress(self) -> Dict[str, Any]:
+        """汇总所有目标的进度快照"""
+        total = {"pending": 0, "in_flight": [], "completed": 0, "skipped": 0, "durations": []}
+        for name, scheduler in self.schedulers.items():
+            progress = scheduler.progress()
+            total["pending"] += progress["pending"]
+            total["completed"] += progress["completed"]
+            total["skipped"] += progress["skipped"]
+            total["durations"].extend(progress["durations"])
+            for entry in progress["in_flight"]:
+                entry["feature"] = f"{name}: {entry['feature']}"
+                total["in_flight"].append(entry)
+        return total
@@ -0,0 +1,202 @@
+"""
+协作式取消与优雅关闭
+
+收到SIGINT（Ctrl-C）或SIGTERM（CI超时）后：停止派发新任务，给执行中的功能点
+一个宽限期，之后取消剩余Worker；浏览器并发关闭（kill）且有超时，关闭后再按
+profile目录查找残留的Chromium进程并结束，最后照常保存（部分）报告。
+第二次收到信号时不再等待宽限期。
+"""
+
+import asyncio
+import os
+import signal
+from typing import Any, Callable, List, Optional
+
+_SIGNALS = [signal.SIGINT] + ([signal.SIGTERM] if hasattr(signal, "SIGTERM") else [])
+
+
+def _user_data_dirs(cmdline: List[str]) -> List[str]:
+    """命令行中的--user-data-dir取值（支持 --user-data-dir=DIR 和 --user-data-dir DIR 两种写法）"""
+    dirs = []
+    for i, arg in enumerate(cmdline):
+        if arg.startswith("--user-data-dir="):
+            dirs.append(arg.split("=", 1)[1])
+        elif arg == "--user-data-dir" and i + 1 < len(cmdline):
+            dirs.append(cmdline[i + 1])
+    return dirs
+
+
+def _process_cwd(pid: int, psutil=None) -> Optional[str]:
+    """进程的工作目录，用于解析相对的--user-data-dir；无法获取时返回None"""
+    try:
+        if psutil is not None:
+            return psutil.Process(pid).cwd()
+        return os.readlink(f"/proc/{pid}/cwd")
+    except Exception:
+        return None
+
+
+def _resolves_to(pid: int, path: str, own_dirs: set, psutil=None) -> bool:
+    """进程的--user-data-dir是否解析为本次运行的profile目录（相对路径按该进程的工作目录解析）"""
+    path = os.path.expanduser(path)
+    if not os.path.isabs(path):
+        cwd = _process_cwd(pid, psutil)
+        if cwd is None:
+            return False
+        path = os.path.join(cwd, path)
+    return os.path.realpath(path) in own_dirs
+
+
+def kill_orphaned_browsers(profile_dirs: List[str]) -> int:
+    """结束用户目录正是profile_dirs之一的浏览器进程（本次运行创建的浏览器），返回结束的进程数
+    
+    按解析后的绝对路径比较：其他运行的浏览器即使目录名相同（例如/tmp/other/test-profile-v2-0），
+    也不会被误杀。
+    """
+    own_dirs = {os.path.realpath(path) for path in profile_dirs}
+    if not own_dirs:
+        return 0
+    
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    
+    candidates = []
+    if psutil is not None:
+        for process in psutil.process_iter(["pid", "cmdline"]):
+            candidates.append((process.info["pid"], process.info["cmdline"] or []))
+    elif os.path.isdir("/proc"):
+        for pid in filter(str.isdigit, os.listdir("/proc")):
+            try:
+                with open(f"/proc/{pid}/cmdline", "rb") as f:
+                    candidates.append((int(pid), f.read().decode(errors="replace").split("\0")))
+            except OSError:
+                continue
+    
+    killed = 0
+    kill_signal = getattr(signal, "SIGKILL", signal.SIGTERM)
+    for pid, cmdline in candidates:
+        if pid == os.getpid():
+            continue
+        if not any(_resolves_to(pid, path, own_dirs, psutil) for path in _user_data_dirs(cmdline)):
+            continue
+        try:
+            os.kill(pid, kill_signal)
+            killed += 1
+        except OSError:
+            pass
+    
+    if killed:
+        print(f"已结束 {killed} 个残留浏览器进程")
+    return killed
+
+
+class ShutdownController:
+    """关闭控制器
+    
+    install()在当前事件循环上注册信号处理；Worker阶段由supervise()托管，
+    收到关闭请求时调用on_request()注册的回调（例如让调度器停止派发），
+    宽限期结束后取消仍未完成的Worker。不在托管阶段（例如功能点发现）时直接取消主任务。
+    需要在事件循环中创建。
+    """
+    
+    def __init__(self, grace_period: float = 30.0, close_timeout: float = 10.0):
+        self.grace_period = grace_period
+        self.close_timeout = close_timeout
+        self.requested = False
+        self.stop_event = asyncio.Event()
+        self.force_event = asyncio.Event()
+        self.callbacks: List[Callable[[], Any]] = []
+        self.main_task: Optional[asyncio.Task] = None
+        self.supervising = False
+        self._previous_handlers = {}
+    
+    def install(self):
+        """在当前事件循环上注册SIGINT/SIGTERM处理"""
+        loop = asyncio.get_running_loop()
+        self.main_task = asyncio.current_task()
+        for sig in _SIGNALS:
+            try:
+                loop.add_signal_handler(sig, self.request)
+            except (NotImplementedError, RuntimeError):
+                # Windows不支持add_signal_handler，退回signal.signal
+                self._previous_handlers[sig] = signal.signal(
+                    sig, lambda *_: loop.call_soon_threadsafe(self.request)
+                )
+    
+    def uninstall(self):
+        """恢复默认信号处理"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        for sig in _SIGNALS:
+            if sig in self._previous_handlers:
+                signal.signal(sig, self._previous_handlers.pop(sig))
+            else:
+                loop.remove_signal_handler(sig)
+    
+    def on_request(self, callback: Callable[[], Any]):
+        """注册收到关闭请求时调用的回调"""
+        self.callbacks.append(callback)
+    
+    def request(self):
+        """请求关闭；再次请求时立即取消所有Worker"""
+        if self.requested:
+            print("\n再次收到中断信号，立即取消所有执行中的任务")
+            self.force_event.set()
+            return
+        
+        self.requested = True
+        print(f"\n收到中断信号：停止派发新任务，等待执行中的功能点完成（最多{self.grace_period}秒），再次中断立即退出")
+        for callback in self.callbacks:
+            callback()
+        self.stop_event.set()
+        
+        if not self.supervising and self.main_task is not None:
+            self.main_task.cancel()
+    
+    def consume_cancel(self) -> bool:
+        """主任务因关闭请求被取消时调用：返回True表示取消来自关闭请求，调用方可继续收尾"""
+        if not self.requested:
+            return False
+        task = asyncio.current_task()
+        if hasattr(task, "uncancel"):
+            task.uncancel()
+        return True
+    
+    async def supervise(self, tasks: List[asyncio.Future]) -> List[Any]:
+        """等待所有Worker完成，结果顺序与tasks一致（异常作为结果返回）"""
+        self.supervising = True
+        try:
+            pending = await self._wait(set(tasks), self.stop_event)
+            if pending:
+                pending = await self._wait(pending, self.force_event, timeout=self.grace_period)
+            if pending:
+                print(f"取消 {len(pending)} 个仍在执行的Worker")
+                for task in pending:
+                    task.cancel()
+            return await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.supervising = False
+    
+    @staticmethod
+    async def _wait(pending: set, event: asyncio.Event, timeout: Optional[float] = None) -> set:
+        """等待pending全部完成、event被设置或超时，返回仍未完成的任务"""
+        waiter = asyncio.ensure_future(event.wait())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        try:
+            while pending and not event.is_set():
+                remaining = deadline - loop.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    break
+                done, _ = await asyncio.wait(pending | {waiter}, timeout=remaining,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                pending = pending - done
+        finally:
+            waiter.cancel()
+        return pending
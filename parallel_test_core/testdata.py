@@ -0,0 +1,482 @@
+"""
+表单测试数据生成
+
+从页面DOM中解析表单结构（字段类型、name、长度/取值约束、下拉选项），
+在本地确定性地生成有效数据和边界值数据，再生成一条"一次填写整个表单"的指令，
+Agent不需要逐个字段让LLM构造数据，失败也可以用同样的数据复现。
+"""
+
+import random
+import re
+import string
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import List, Dict, Any, Optional
+
+try:
+    from re import _parser as _regex_parser  # Python 3.11+
+except ImportError:
+    import sre_parse as _regex_parser
+
+# 不需要填写的input类型
+_SKIPPED_INPUT_TYPES = {"hidden", "submit", "button", "reset", "image", "file"}
+
+# 按pattern生成字符时的候选字符
+_PATTERN_CHARS = string.ascii_letters + string.digits + "_-.@ "
+_ASCII_WORD = string.ascii_letters + string.digits + "_"
+
+
+@dataclass
+class FormField:
+    """表单字段"""
+    name: str
+    tag: str = "input"  # input / select / textarea
+    type: str = "text"
+    label: str = ""
+    required: bool = False
+    minlength: Optional[int] = None
+    maxlength: Optional[int] = None
+    min: Optional[str] = None
+    max: Optional[str] = None
+    pattern: str = ""
+    options: List[str] = field(default_factory=list)  # select/radio/checkbox的可选值
+
+
+@dataclass
+class FormSchema:
+    """表单结构"""
+    name: str = ""  # 表单的id或name
+    action: str = ""
+    method: str = "get"
+    fields: List[FormField] = field(default_factory=list)
+    
+    def is_login(self) -> bool:
+        """只有账号和密码的表单视为登录表单（由auth模板使用配置的账号测试）"""
+        has_password = any(f.type == "password" for f in self.fields)
+        return has_password and len(self.fields) <= 3
+    
+    def is_search(self) -> bool:
+        """单个搜索框的表单视为搜索"""
+        return len(self.fields) == 1 and (
+            self.fields[0].type == "search" or self.fields[0].name.lower() in ("q", "search", "keyword", "query")
+        )
+
+
+def _to_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _FormSchemaParser(HTMLParser):
+    """从HTML中提取所有<form>的字段结构"""
+    
+    def __init__(self):
+        super().__init__()
+        self.forms: List[FormSchema] = []
+        self.labels: Dict[str, str] = {}  # label的for属性 -> 文本
+        self.field_ids: Dict[int, str] = {}  # id(FormField) -> 元素id，用于关联label
+        self._form: Optional[FormSchema] = None
+        self._select: Optional[FormField] = None
+        self._label_for: Optional[str] = None
+        self._label_text: List[str] = []
+    
+    def handle_starttag(self, tag, attrs):
+        attrs = {k: (v if v is not None else "") for k, v in attrs}
+        
+        if tag == "form":
+            self._form = FormSchema(
+                name=attrs.get("id") or attrs.get("name", ""),
+                action=attrs.get("action", ""),
+                method=attrs.get("method", "get").lower(),
+            )
+            self.forms.append(self._form)
+        elif tag == "label":
+            self._label_for = attrs.get("for", "")
+            self._label_text = []
+        elif tag == "option" and self._select is not None:
+            value = attrs.get("value")
+            if value is not None:
+                self._select.options.append(value)
+        elif tag in ("input", "select", "textarea") and self._form is not None:
+            self._add_field(tag, attrs)
+    
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self._form = None
+            self._select = None
+        elif tag == "select":
+            self._select = None
+        elif tag == "label" and self._label_for is not None:
+            if self._label_for:
+                self.labels[self._label_for] = "".join(self._label_text).strip()
+            self._label_for = None
+    
+    def handle_data(self, data):
+        if self._label_for is not None:
+            self._label_text.append(data)
+    
+    def _add_field(self, tag: str, attrs: Dict[str, str]):
+        input_type = attrs.get("type", "text").lower() if tag == "input" else tag
+        if input_type in _SKIPPED_INPUT_TYPES:
+            return
+        
+        name = attrs.get("name") or attrs.get("id")
+        if not name:
+            return
+        
+        # 同名的单选框/复选框合并为一个字段，值作为选项
+        if input_type in ("radio", "checkbox"):
+            for existing in self._form.fields:
+                if existing.name == name and existing.type == input_type:
+                    existing.options.append(attrs.get("value", "on"))
+                    return
+        
+        form_field = FormField(
+            name=name,
+            tag=tag,
+            type=input_type,
+            label=attrs.get("aria-label") or attrs.get("placeholder", ""),
+            required="required" in attrs,
+            minlength=_to_int(attrs.get("minlength")),
+            maxlength=_to_int(attrs.get("maxlength")),
+            min=attrs.get("min"),
+            max=attrs.get("max"),
+            pattern=attrs.get("pattern", ""),
+        )
+        if input_type in ("radio", "checkbox"):
+            form_field.options.append(attrs.get("value", "on"))
+        if tag == "select":
+            self._select = form_field
+        if attrs.get("id"):
+            self.field_ids[id(form_field)] = attrs["id"]
+        self._form.fields.append(form_field)
+
+
+def parse_forms(html: str) -> List[FormSchema]:
+    """解析页面中的所有表单（不含任何可填写字段的表单会被忽略）"""
+    parser = _FormSchemaParser()
+    try:
+        parser.feed(html or "")
+        parser.close()
+    except Exception:
+        pass
+    
+    for form in parser.forms:
+        for form_field in form.fields:
+            element_id = parser.field_ids.get(id(form_field))
+            if element_id in parser.labels:
+                form_field.label = parser.labels[element_id]
+    
+    return [form for form in parser.forms if form.fields]
+
+
+def name_tokens(name: str) -> List[str]:
+    """把字段名拆分为小写单词：user_email、userEmail、user-email 都拆成 ["user", "email"]"""
+    name = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", name or "")
+    return re.findall(r"[a-z]+|[0-9]+|[^\x00-\x7f]+", name.lower())
+
+
+def pattern_matches(pattern: str, value: str) -> bool:
+    """值是否满足HTML的pattern属性（整个值匹配）；pattern无效时视为满足
+    
+    HTML的pattern按JavaScript正则解释，\\w和\\d只匹配ASCII字符，因此使用re.ASCII。
+    """
+    try:
+        return re.fullmatch(f"(?:{pattern})", value, re.ASCII) is not None
+    except re.error:
+        return True
+
+
+def _class_contains(items: list, char: str) -> bool:
+    """字符是否属于正则解析树中的字符集"""
+    negate = False
+    matched = False
+    for op, value in items:
+        op = str(op)
+        if op == "NEGATE":
+            negate = True
+        elif op == "LITERAL":
+            matched = matched or char == chr(value)
+        elif op == "RANGE":
+            matched = matched or value[0] <= ord(char) <= value[1]
+        elif op == "CATEGORY":
+            # 与JavaScript正则一致：\d和\w只包含ASCII字符
+            category = str(value)
+            if "DIGIT" in category:
+                hit = char in string.digits
+            elif "WORD" in category:
+                hit = char in _ASCII_WORD
+            else:
+                hit = char.isspace()
+            matched = matched or (hit != category.startswith("CATEGORY_NOT"))
+    return matched != negate
+
+
+def _class_sample(items: list, rng: random.Random) -> str:
+    candidates = [char for char in _PATTERN_CHARS if _class_contains(items, char)]
+    if candidates:
+        return rng.choice(candidates)
+    # 候选字符之外的字符集（例如[\u4e00-\u9fa5]）：取第一个字面字符或范围起点
+    for op, value in items:
+        if str(op) == "LITERAL":
+            return chr(value)
+        if str(op) == "RANGE":
+            return chr(value[0])
+    return "x"
+
+
+def _sample_pattern(tree, rng: random.Random) -> str:
+    """按正则解析树随机生成一个匹配的字符串；不定长重复最多多取3次"""
+    parts = []
+    for op, value in tree:
+        op = str(op)
+        if op == "LITERAL":
+            parts.append(chr(value))
+        elif op == "NOT_LITERAL":
+            parts.append(rng.choice([c for c in string.ascii_letters + string.digits if c != chr(value)]))
+        elif op == "ANY":
+            parts.append(rng.choice(string.ascii_letters + string.digits))
+        elif op == "IN":
+            parts.append(_class_sample(value, rng))
+        elif op in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+            low, high, subpattern = value
+            count = rng.randint(low, min(high, low + 3))
+            parts.extend(_sample_pattern(subpattern, rng) for _ in range(count))
+        elif op == "SUBPATTERN":
+            parts.append(_sample_pattern(value[-1], rng))
+        elif op == "ATOMIC_GROUP":
+            parts.append(_sample_pattern(value, rng))
+        elif op == "BRANCH":
+            parts.append(_sample_pattern(rng.choice(value[1]), rng))
+        # AT（锚点）、断言等不产生字符
+    return "".join(parts)
+
+
+def select_form(forms: List[FormSchema]) -> Optional[FormSchema]:
+    """选出数据录入表单：排除登录和搜索表单，取字段最多的一个"""
+    candidates = [form for form in forms if not form.is_login() and not form.is_search()]
+    return max(candidates, key=lambda form: len(form.fields), default=None)
+
+
+class TestDataGenerator:
+    """确定性测试数据生成器
+    
+    同一个seed、同一个表单结构总是生成相同的数据。
+    """
+    
+    # 文本字段按name拆分出的单词选取取值（整词匹配：hotel_name不会被当作tel，message不会被当作age）
+    text_values = [
+        (("email", "mail", "emailaddress"), "email"),
+        (("phone", "mobile", "tel", "telephone", "cellphone", "phonenumber", "手机", "电话"), "tel"),
+        (("url", "website", "homepage", "site", "网址"), "url"),
+        (("user", "username", "userid", "account", "login", "loginname", "账号", "用户名"), "test_user{n}"),
+        (("name", "firstname", "lastname", "fullname", "realname", "nickname", "姓名"), "测试用户{n}"),
+        (("age", "年龄"), "30"),
+        (("zip", "zipcode", "postal", "postcode", "邮编"), "100000"),
+        (("address", "addr", "street", "地址"), "北京市朝阳区测试路{n}号"),
+        (("title", "subject", "标题"), "测试标题{n}"),
+    ]
+    
+    def __init__(self, seed: str = "parallel-test"):
+        self.seed = seed
+    
+    def generate(self, form: FormSchema, boundary: bool = False) -> Dict[str, Any]:
+        """生成表单测试数据：有效数据、边界值用例和填写指令"""
+        payload = self.valid_payload(form)
+        cases = self.boundary_cases(form, payload) if boundary else []
+        return {
+            "form": form.name or form.action,
+            "payload": payload,
+            "boundary_cases": cases,
+            "instruction": self.fill_instruction(form, payload, cases),
+        }
+    
+    def valid_payload(self, form: FormSchema) -> Dict[str, str]:
+        """满足所有约束的有效数据"""
+        return {f.name: self.valid_value(f, self._rng(form, f)) for f in form.fields}
+    
+    def valid_value(self, form_field: FormField, rng: random.Random) -> str:
+        """单个字段的有效值；字段有pattern且按类型/名称生成的值不满足时，按pattern生成"""
+        value = self._typed_field_value(form_field, rng)
+        if form_field.pattern and not pattern_matches(form_field.pattern, value):
+            value = self._pattern_value(form_field, rng) or value
+        return value
+    
+    def _typed_field_value(self, form_field: FormField, rng: random.Random) -> str:
+        n = rng.randint(100, 999)
+        kind = form_field.type
+        
+        if kind in ("select", "radio", "checkbox"):
+            options = [option for option in form_field.options if option]
+            return options[0] if options else "on"
+        if kind in ("number", "range"):
+            return self._number_value(form_field)
+        if kind == "textarea":
+            value = f"自动生成的测试文本{n}"
+        elif kind in ("email", "tel", "url"):
+            value = self._typed_value(kind, n)
+        elif kind == "password":
+            value = f"Test@{n}abc"
+        elif kind in ("date", "datetime-local", "time", "month", "week"):
+            return form_field.min or {
+                "date": "2024-01-15",
+                "datetime-local": "2024-01-15T10:30",
+                "time": "10:30",
+                "month": "2024-01",
+                "week": "2024-W03",
+            }[kind]
+        elif kind == "color":
+            return "#3366cc"
+        else:
+            value = self._text_value(form_field.name, n)
+        
+        return self._fit_length(value, form_field)
+    
+    def boundary_cases(self, form: FormSchema, payload: Dict[str, str]) -> List[Dict[str, Any]]:
+        """边界值用例：每个用例只修改一个字段，expect表示预期表单接受还是拒绝
+        
+        预期接受的长度边界值保持字段的格式（邮箱、URL、pattern），构造不出时不生成该用例。
+        """
+        cases = []
+        for f in form.fields:
+            rng = self._rng(form, f)
+            if f.maxlength:
+                value = self._sized_value(f, f.maxlength, rng)
+                if value is not None:
+                    cases.append(self._case(payload, f, "最大长度", value, "accept"))
+            if f.minlength:
+                value = self._sized_value(f, f.minlength, rng)
+                if value is not None:
+                    cases.append(self._case(payload, f, "最小长度", value, "accept"))
+                cases.append(self._case(payload, f, "短于最小长度", "x" * (f.minlength - 1), "reject"))
+            if f.type in ("number", "range"):
+                if f.min is not None:
+                    cases.append(self._case(payload, f, "最小值", f.min, "accept"))
+                if f.max is not None:
+                    cases.append(self._case(payload, f, "最大值", f.max, "accept"))
+            if f.required and f.type not in ("select", "radio", "checkbox"):
+                cases.append(self._case(payload, f, "必填为空", "", "reject"))
+        return cases
+    
+    def fill_instruction(self, form: FormSchema, payload: Dict[str, str],
+                         cases: Optional[List[Dict[str, Any]]] = None) -> str:
+        """生成一次性填写整个表单的指令"""
+        fields = {f.name: f for f in form.fields}
+        lines = ["按以下数据一次性填写整个表单（按name/id定位字段，不要自行构造数据）："]
+        for name, value in payload.items():
+            lines.append(f"    {self._describe(fields[name], value)}")
+        lines.append("  填写完成后提交表单，验证提交结果")
+        
+        if cases:
+            lines.append("  然后依次按以下边界值修改对应字段并重新提交，记录每次是否被接受：")
+            for i, case in enumerate(cases, 1):
+                expect = "预期接受" if case["expect"] == "accept" else "预期拒绝"
+                lines.append(f"    {i}. {case['case']}（{expect}）: {case['field']} = \"{case['value']}\"")
+        
+        return "\n".join(lines)
+    
+    def _rng(self, form: FormSchema, form_field: FormField) -> random.Random:
+        # 字符串种子的哈希不受PYTHONHASHSEED影响，每次运行结果相同
+        return random.Random(f"{self.seed}:{form.name or form.action}:{form_field.name}")
+    
+    @staticmethod
+    def _case(payload: Dict[str, str], form_field: FormField, label: str,
+              value: str, expect: str) -> Dict[str, Any]:
+        return {
+            "case": f"{label} {form_field.name}",
+            "field": form_field.name,
+            "value": value,
+            "expect": expect,
+            "payload": dict(payload, **{form_field.name: value}),
+        }
+    
+    @staticmethod
+    def _describe(form_field: FormField, value: str) -> str:
+        label = f"（{form_field.label}）" if form_field.label else ""
+        if form_field.type == "checkbox":
+            return f"- {form_field.name}{label}: 勾选 \"{value}\""
+        if form_field.type in ("select", "radio"):
+            return f"- {form_field.name}{label}: 选择 \"{value}\""
+        return f"- {form_field.name}{label} = \"{value}\""
+    
+    def _text_template(self, name: str) -> Optional[str]:
+        tokens = set(name_tokens(name))
+        for keywords, template in self.text_values:
+            if tokens.intersection(keywords):
+                return template
+        return None
+    
+    def _text_value(self, name: str, n: int) -> str:
+        template = self._text_template(name)
+        if template is None:
+            return f"测试数据{n}"
+        if template in ("email", "tel", "url"):
+            return self._typed_value(template, n)
+        return template.format(n=n)
+    
+    def _pattern_value(self, form_field: FormField, rng: random.Random,
+                       length: Optional[int] = None, attempts: int = 50) -> Optional[str]:
+        """按pattern生成满足pattern和长度约束的值（指定length时长度必须相等），生成不出时返回None"""
+        try:
+            tree = _regex_parser.parse(form_field.pattern)
+        except Exception:
+            return None
+        
+        for _ in range(attempts):
+            value = _sample_pattern(tree, rng)
+            if length is not None:
+                fits = len(value) == length
+            else:
+                fits = (form_field.minlength is None or len(value) >= form_field.minlength) and \
+                       (form_field.maxlength is None or len(value) <= form_field.maxlength)
+            if fits and pattern_matches(form_field.pattern, value):
+                return value
+        return None
+    
+    def _sized_value(self, form_field: FormField, length: int, rng: random.Random) -> Optional[str]:
+        """长度恰好为length、格式仍然有效的值，构造不出时返回None"""
+        if form_field.pattern:
+            return self._pattern_value(form_field, rng, length)
+        
+        kind = form_field.type
+        if kind not in ("email", "tel", "url"):
+            kind = self._text_template(form_field.name)
+        
+        if kind == "email":
+            domain = "@example.com" if length > 12 else "@x"
+            return "x" * (length - len(domain)) + domain if length > len(domain) else None
+        if kind == "url":
+            prefix = "https://example.com/" if length >= 20 else "http://"
+            return prefix + "x" * (length - len(prefix)) if length > len(prefix) else None
+        if kind == "tel":
+            return ("138" + "0" * length)[:length]
+        return "x" * length
+    
+    @staticmethod
+    def _typed_value(kind: str, n: int) -> str:
+        return {
+            "email": f"test{n}@example.com",
+            "tel": f"13800138{n}",
+            "url": f"https://example.com/test{n}",
+        }[kind]
+    
+    @staticmethod
+    def _number_value(form_field: FormField) -> str:
+        low, high = _to_int(form_field.min), _to_int(form_field.max)
+        if low is not None and high is not None:
+            return str((low + high) // 2)
+        if low is not None:
+            return str(low + 1)
+        if high is not None:
+            return str(min(high, 1))
+        return "1"
+    
+    @staticmethod
+    def _fit_length(value: str, form_field: FormField) -> str:
+        if form_field.maxlength is not None:
+            value = value[:form_field.maxlength]
+        if form_field.minlength is not None and len(value) < form_field.minlength:
+            value = value + "x" * (form_field.minlength - len(value))
+        return value
@@ -3,107 +3,65 @@
 基于browser_use实现，支持多线程并行测试，大幅提升测试速度
 """
 
-from browser_use import Agent, Browser, ChatBrowserUse
-from dotenv import load_dotenv
 import asyncio
-import json
-from datetime import datetime
-from typing import List, Dict, Any
-import os
+import time
+from typing import List, Dict, Any, Optional
 
-load_dotenv()
-
-
-class ParallelTestConfig:
-    """并行测试配置"""
-    
-    def __init__(self, target_url: str, username: str = "admin", password: str = "admin"):
-        self.target_url = target_url
-        self.username = username
-        self.password = password
-        self.num_parallel_agents = 5  # 并行Agent数量
-        self.headless = False  # 是否使用无头模式
-        self.flash_mode = True  # 快速模式
-
-
-class TestLogger:
-    """测试日志记录器"""
-    
-    def __init__(self, output_file: str = "parallel_test_report.json"):
-        self.output_file = output_file
-        self.test_results = {
-            "start_time": datetime.now().isoformat(),
-            "end_time": None,
-            "target_url": None,
-            "total_tests": 0,
-            "passed_tests": 0,
-            "failed_tests": 0,
-            "test_details": []
-        }
-        self.lock = asyncio.Lock()
-    
-    async def log_test(self, agent_id: str, test_type: str, description: str, 
-                      status: str, details: Dict = None):
-        """记录单个测试（线程安全）"""
-        async with self.lock:
-            self.test_results["total_tests"] += 1
-            if status == "passed":
-                self.test_results["passed_tests"] += 1
-            else:
-                self.test_results["failed_tests"] += 1
-            
-            test_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "agent_id": agent_id,
-                "type": test_type,
-                "description": description,
-                "status": status,
-                "details": details or {}
-            }
-            self.test_results["test_details"].append(test_entry)
-            
-            # 实时打印
-            print(f"[{agent_id}] [{status.upper()}] {test_type}: {description}")
-    
-    def save_report(self):
-        """保存测试报告"""
-        self.test_results["end_time"] = datetime.now().isoformat()
-        with open(self.output_file, 'w', encoding='utf-8') as f:
-            json.dump(self.test_results, f, ensure_ascii=False, indent=2)
-        
-        print(f"\n{'='*60}")
-        print(f"测试报告已保存到: {self.output_file}")
-        print(f"总测试数: {self.test_results['total_tests']}")
-        print(f"通过: {self.test_results['passed_tests']}")
-        print(f"失败: {self.test_results['failed_tests']}")
-        print(f"{'='*60}")
+from parallel_test_core.config import ParallelTestConfig
+from parallel_test_core.dashboard import TimedLLM, collect_metrics, final_result_text
+from parallel_test_core.features import PageTemplateDetector
+from parallel_test_core.report import TaskTestLogger as TestLogger
+from parallel_test_core.runner import AgentRunner, close_browsers, create_browsers, run_with_browsers
+from parallel_test_core.shutdown import ShutdownController
+from parallel_test_core.testdata import TestDataGenerator, parse_forms
 
 
 class ParallelWebsiteTestAgent:
     """并行网站自动化测试Agent"""
     
-    def __init__(self, config: ParallelTestConfig):
+    def __init__(self, config: ParallelTestConfig, runner: Optional[AgentRunner] = None):
         self.config = config
+        self.runner = runner or AgentRunner()
         self.logger = TestLogger()
         self.logger.test_results["target_url"] = config.target_url
     
-    def create_browsers(self) -> List[Browser]:
+    def create_browsers(self) -> List[Any]:
         """创建多个独立的浏览器实例"""
-        browsers = []
-        for i in range(self.config.num_parallel_agents):
-            browser = Browser(
-                user_data_dir=f'./test-profile-{i}',
-                headless=self.config.headless,
-            )
-            browsers.append(browser)
-        return browsers
+        return create_browsers(self.runner, self.config.num_parallel_agents, './test-profile', self.config.headless)
     
-    def create_test_tasks(self) -> List[Dict[str, Any]]:
-        """创建测试任务列表"""
+    async def prepare_form_data(self) -> List[Dict[str, Any]]:
+        """解析目标页面的表单并生成确定性测试数据（页面获取失败或没有表单时返回空列表）"""
+        if self.config.form_data == "none":
+            return []
+        
+        html = await PageTemplateDetector().fetch(self.config.target_url)
+        generator = TestDataGenerator(self.config.form_data_seed)
+        boundary = self.config.form_data == "boundary"
+        return [
+            generator.generate(form, boundary=boundary)
+            for form in parse_forms(html)
+            if not form.is_login() and not form.is_search()
+        ]
+    
+    def create_test_tasks(self, form_data: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """创建测试任务列表；有表单测试数据时，表单测试按数据一次填写整个表单"""
         url = self.config.target_url
         username = self.config.username
         password = self.config.password
         
+        if form_data:
+            form_steps = "\n".join(
+                f"   - 表单「{data['form']}」：{data['instruction']}" for data in form_data
+            ) + "\n   - 其他表单（例如登录后才出现的表单）按字段类型填写测试数据"
+        else:
+            form_steps = """   - 根据字段类型智能填充测试数据：
+     * email字段: test@example.com
+     * 文本字段: 测试数据
+     * 数字字段: 123
+     * 日期字段: 当前日期
+     * 下拉框: 选择第一个选项
+     * 复选框: 勾选"""
+        
         tasks = [
             {
                 "id": "task_1",
@@ -151,13 +109,7 @@ class ParallelWebsiteTestAgent:
 1. 识别页面上的所有表单（除了登录表单）
 2. 对于每个表单：
    - 识别所有输入字段
-   - 根据字段类型智能填充测试数据：
-     * email字段: test@example.com
-     * 文本字段: 测试数据
-     * 数字字段: 123
-     * 日期字段: 当前日期
-     * 下拉框: 选择第一个选项
-     * 复选框: 勾选
+{form_steps}
    - 提交表单
    - 观察并记录提交结果
 3. 如果遇到需要登录才能访问的表单，先使用 {username}/{password} 登录
@@ -213,7 +165,7 @@ class ParallelWebsiteTestAgent:
         
         return tasks
     
-    async def run_single_agent(self, task_info: Dict, browser: Browser) -> Dict:
+    async def run_single_agent(self, task_info: Dict, browser: Any) -> Dict:
         """运行单个Agent"""
         agent_id = task_info["agent_id"]
         task_type = task_info["type"]
@@ -222,26 +174,30 @@ class ParallelWebsiteTestAgent:
         
         print(f"\n[{agent_id}] 开始执行: {description}")
         
+        # 与V2相同：通过LLM代理统计调用次数/token，报告中记录结构化指标
+        llm = TimedLLM(self.runner.create_llm())
+        started = time.monotonic()
+        
         try:
-            # 创建Agent
-            agent = Agent(
+            # 创建并运行Agent
+            result = await self.runner.run(
                 task=task,
-                llm=ChatBrowserUse(),
+                llm=llm,
                 browser=browser,
                 flash_mode=self.config.flash_mode,
                 max_steps=50,
             )
             
-            # 运行Agent
-            result = await agent.run()
-            
             # 记录成功
             await self.logger.log_test(
                 agent_id=agent_id,
                 test_type=task_type,
                 description=description,
                 status="passed",
-                details={"result": str(result)[:500]}  # 限制长度
+                details={
+                    "result": final_result_text(result)[:500],  # 限制长度
+                    "metrics": collect_metrics(result, llm, time.monotonic() - started),
+                }
             )
             
             return {
@@ -257,7 +213,10 @@ class ParallelWebsiteTestAgent:
                 test_type=task_type,
                 description=description,
                 status="failed",
-                details={"error": str(e)}
+                details={
+                    "error": str(e),
+                    "metrics": collect_metrics(None, llm, time.monotonic() - started),
+                }
             )
             
             return {
@@ -273,25 +232,31 @@ class ParallelWebsiteTestAgent:
         print(f"并行Agent数量: {self.config.num_parallel_agents}")
         print(f"{'='*60}\n")
         
+        # Ctrl-C/SIGTERM时等待宽限期后取消剩余任务，照常保存部分报告并关闭浏览器
+        shutdown = ShutdownController(self.config.shutdown_grace, self.config.close_timeout)
+        shutdown.install()
+        
         # 创建浏览器实例
         print("正在创建浏览器实例...")
         browsers = self.create_browsers()
         
-        # 创建测试任务
-        print("正在创建测试任务...")
-        test_tasks = self.create_test_tasks()
-        
         try:
+            # 创建测试任务
+            print("正在创建测试任务...")
+            test_tasks = self.create_test_tasks(await self.prepare_form_data())
+            
             # 并行运行所有Agent
             print(f"\n开始并行执行 {len(test_tasks)} 个测试任务...\n")
             
-            tasks = [
-                self.run_single_agent(test_tasks[i], browsers[i])
-                for i in range(len(test_tasks))
-            ]
-            
-            # 使用gather并行执行，return_exceptions=True确保一个失败不影响其他
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            # 每个任务使用一个浏览器，一个失败不影响其他
+            results = await run_with_browsers(
+                self.runner,
+                len(test_tasks),
+                './test-profile',
+                lambda i, browser: self.run_single_agent(test_tasks[i], browser),
+                browsers=browsers[:len(test_tasks)],
+                shutdown=shutdown,
+            )
             
             print(f"\n{'='*60}")
             print("所有测试任务已完成！")
@@ -304,20 +269,25 @@ class ParallelWebsiteTestAgent:
             print(f"成功: {success_count}")
             print(f"失败: {error_count}")
             
+        except asyncio.CancelledError:
+            if not shutdown.consume_cancel():
+                raise
+            print("\n测试已中断")
+        
         except Exception as e:
             print(f"\n并行测试过程中发生错误: {e}")
         
         finally:
+            shutdown.uninstall()
+            if shutdown.requested:
+                self.logger.test_results["interrupted"] = True
+            
             # 保存测试报告
             self.logger.save_report()
             
             # 清理浏览器实例
             print("\n正在清理资源...")
-            for browser in browsers:
-                try:
-                    await browser.close()
-                except:
-                    pass
+            await close_browsers(browsers, timeout=self.config.close_timeout, profile_prefix='./test-profile')
 
 
 async def main():
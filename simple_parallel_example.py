@@ -1,137 +1,252 @@
 """
 简化版并行测试示例
 快速上手使用
+
+用法：
+    python simple_parallel_example.py                        # 交互菜单
+    python simple_parallel_example.py --mode compare         # 顺序/并行各跑一遍，输出耗时对比
+    python simple_parallel_example.py --tasks tasks.json --concurrency 5
+
+任务文件格式（任意数量，{target_url}/{username}/{password}会被替换）：
+    [{"name": "登录测试", "task": "访问 {target_url}，使用 {username}/{password} 登录"}]
 """
 
-from browser_use import Agent, Browser, ChatBrowserUse
-from dotenv import load_dotenv
+import argparse
 import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
-load_dotenv()
+from parallel_test_core.runner import AgentRunner, run_with_browsers
 
+TARGET_URL = "http://192.168.218.131:8000/"
+USERNAME = "admin"
+PASSWORD = "admin"
 
-async def test_with_parallel():
-    """使用并行方式测试网站"""
-    
-    target_url = "http://192.168.218.131:8000/"
-    username = "admin"
-    password = "admin"
-    
-    # 创建3个独立的浏览器实例
-    browsers = [
-        Browser(user_data_dir=f'./temp-profile-{i}', headless=False)
-        for i in range(3)
-    ]
-    
-    # 定义3个不同的测试任务
-    tasks_config = [
-        {
-            "name": "登录测试",
-            "task": f"""
+# 默认的3个测试任务
+DEFAULT_TASKS = [
+    {
+        "name": "登录测试",
+        "task": """
 访问 {target_url}，找到登录表单，使用用户名 {username} 和密码 {password} 登录，
 验证登录是否成功，然后退出登录。
-            """
-        },
-        {
-            "name": "导航测试",
-            "task": f"""
+        """
+    },
+    {
+        "name": "导航测试",
+        "task": """
 访问 {target_url}，找到所有导航链接，点击前3个链接，
 验证每个页面是否正常加载，记录页面标题。
-            """
-        },
-        {
-            "name": "表单测试",
-            "task": f"""
+        """
+    },
+    {
+        "name": "表单测试",
+        "task": """
 访问 {target_url}，找到所有表单，智能填充表单字段并提交，
 记录提交结果。如果需要登录，使用 {username}/{password}。
-            """
-        }
-    ]
-    
-    # 创建3个Agent
-    agents = [
-        Agent(
-            task=config["task"],
-            browser=browsers[i],
-            llm=ChatBrowserUse(),
-            flash_mode=True,  # 快速模式
-            max_steps=30,
-        )
-        for i, config in enumerate(tasks_config)
-    ]
+        """
+    }
+]
+
+
+def load_tasks(path: Optional[str] = None, target_url: str = TARGET_URL,
+               username: str = USERNAME, password: str = PASSWORD) -> List[Dict[str, str]]:
+    """加载任务列表（未指定文件时使用默认任务），并替换任务中的占位符"""
+    entries = DEFAULT_TASKS
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    
+    # 用replace而不是format，任务文本中可以包含其他花括号
+    placeholders = {"{target_url}": target_url, "{username}": username, "{password}": password}
+    tasks = []
+    for i, entry in enumerate(entries):
+        task = entry["task"]
+        for placeholder, value in placeholders.items():
+            task = task.replace(placeholder, value)
+        tasks.append({"name": entry.get("name", f"任务{i+1}"), "task": task})
+    return tasks
+
+
+async def run_task_pool(runner: AgentRunner, tasks: List[Dict[str, str]], concurrency: int,
+                        profile_prefix: str = './temp-profile') -> List[Dict[str, Any]]:
+    """用固定数量的Worker执行任意数量的任务
+    
+    同时运行的Agent数量不超过concurrency，每个Worker复用自己的浏览器，
+    从共享队列中领取任务；Agent在领取任务时才创建。concurrency=1即为顺序执行。
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for index in range(len(tasks)):
+        queue.put_nowait(index)
+    
+    results: List[Dict[str, Any]] = [None] * len(tasks)
+    
+    async def worker(worker_id: int, browser: Any):
+        while not queue.empty():
+            index = queue.get_nowait()
+            task = tasks[index]
+            print(f"[Worker-{worker_id+1}] 执行: {task['name']}")
+            
+            started = time.monotonic()
+            try:
+                result = await runner.run(
+                    task=task["task"],
+                    browser=browser,
+                    flash_mode=True,  # 快速模式
+                    max_steps=30,
+                )
+                results[index] = {"name": task["name"], "status": "success", "result": str(result)[:200]}
+            except Exception as e:
+                results[index] = {"name": task["name"], "status": "error", "error": str(e)}
+            
+            results[index]["worker"] = f"Worker-{worker_id+1}"
+            results[index]["seconds"] = round(time.monotonic() - started, 2)
+            print(f"[Worker-{worker_id+1}] 完成: {task['name']} ({results[index]['seconds']}s)")
+    
+    await run_with_browsers(runner, max(1, min(concurrency, len(tasks))), profile_prefix, worker)
+    return results
+
+
+def print_results(results: List[Dict[str, Any]]):
+    """打印每个任务的结果"""
+    for result in results:
+        print(f"\n[{result['name']}]")
+        if result["status"] == "error":
+            print(f"  状态: 失败")
+            print(f"  错误: {result['error']}")
+        else:
+            print(f"  状态: 成功")
+            print(f"  结果: {result['result']}...")
+
+
+async def test_with_parallel(tasks: Optional[List[Dict[str, str]]] = None, concurrency: int = 3) -> float:
+    """使用并行方式测试网站，返回总耗时（秒）"""
+    tasks = tasks or load_tasks()
+    runner = AgentRunner()
     
     print(f"\n{'='*60}")
-    print(f"开始并行测试: {target_url}")
+    print(f"开始并行测试: {len(tasks)}个任务, 并发数{concurrency}")
     print(f"{'='*60}\n")
     
-    # 并行运行所有Agent
-    tasks = [agent.run() for agent in agents]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    started = time.monotonic()
+    results = await run_task_pool(runner, tasks, concurrency)
+    elapsed = time.monotonic() - started
     
     print(f"\n{'='*60}")
-    print("测试完成！")
+    print(f"测试完成！总耗时: {elapsed:.1f}s")
     print(f"{'='*60}\n")
     
-    # 打印结果
-    for i, (config, result) in enumerate(zip(tasks_config, results)):
-        print(f"\n[{config['name']}]")
-        if isinstance(result, Exception):
-            print(f"  状态: 失败")
-            print(f"  错误: {result}")
-        else:
-            print(f"  状态: 成功")
-            print(f"  结果: {str(result)[:200]}...")
+    print_results(results)
+    return elapsed
 
 
-async def test_sequential():
-    """使用顺序方式测试网站（对比用）"""
+async def test_sequential(tasks: Optional[List[Dict[str, str]]] = None) -> float:
+    """使用顺序方式测试网站（对比用），返回总耗时（秒）"""
+    tasks = tasks or load_tasks()
+    runner = AgentRunner()
+    
+    print(f"\n{'='*60}")
+    print(f"开始顺序测试: {len(tasks)}个任务")
+    print(f"{'='*60}\n")
     
-    target_url = "http://192.168.218.131:8000/"
-    username = "admin"
-    password = "admin"
+    # 顺序执行每个测试，复用同一个浏览器
+    started = time.monotonic()
+    results = await run_task_pool(runner, tasks, concurrency=1, profile_prefix='./temp-profile-sequential')
+    elapsed = time.monotonic() - started
     
     print(f"\n{'='*60}")
-    print(f"开始顺序测试: {target_url}")
+    print(f"顺序测试完成！总耗时: {elapsed:.1f}s")
     print(f"{'='*60}\n")
     
-    # 顺序执行每个测试
-    tasks_config = [
-        {"name": "登录测试", "task": f"访问 {target_url}，使用 {username}/{password} 登录"},
-        {"name": "导航测试", "task": f"访问 {target_url}，测试所有导航链接"},
-        {"name": "表单测试", "task": f"访问 {target_url}，测试所有表单"},
-    ]
-    
-    for config in tasks_config:
-        print(f"\n执行: {config['name']}")
-        agent = Agent(
-            task=config["task"],
-            llm=ChatBrowserUse(),
-            flash_mode=True,
-        )
-        result = await agent.run()
-        print(f"完成: {config['name']}")
+    print_results(results)
+    return elapsed
+
+
+async def compare_modes(tasks: Optional[List[Dict[str, str]]] = None, concurrency: int = 3,
+                        output_file: str = "parallel_comparison_report.json") -> Dict[str, Any]:
+    """顺序和并行模式先后各跑一遍同样的任务，输出逐任务耗时对比和加速比"""
+    tasks = tasks or load_tasks()
+    runner = AgentRunner()
     
     print(f"\n{'='*60}")
-    print("顺序测试完成！")
+    print(f"顺序 vs 并行: {len(tasks)}个任务, 并发数{concurrency}")
     print(f"{'='*60}\n")
+    
+    started = time.monotonic()
+    sequential = await run_task_pool(runner, tasks, concurrency=1, profile_prefix='./temp-profile-sequential')
+    sequential_seconds = time.monotonic() - started
+    
+    started = time.monotonic()
+    parallel = await run_task_pool(runner, tasks, concurrency)
+    parallel_seconds = time.monotonic() - started
+    
+    speedup = sequential_seconds / parallel_seconds if parallel_seconds else None
+    report = {
+        "time": datetime.now().isoformat(),
+        "tasks": len(tasks),
+        "concurrency": concurrency,
+        "sequential_seconds": round(sequential_seconds, 2),
+        "parallel_seconds": round(parallel_seconds, 2),
+        "speedup": round(speedup, 2) if speedup else None,
+        "details": [
+            {
+                "name": s["name"],
+                "sequential_seconds": s["seconds"],
+                "sequential_status": s["status"],
+                "parallel_seconds": p["seconds"],
+                "parallel_status": p["status"],
+            }
+            for s, p in zip(sequential, parallel)
+        ],
+    }
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    print(f"\n{'='*60}")
+    print("耗时对比")
+    print(f"{'='*60}")
+    print(f"{'任务':<20}{'顺序':>10}{'并行':>10}")
+    for item in report["details"]:
+        print(f"{item['name']:<20}{item['sequential_seconds']:>9.1f}s{item['parallel_seconds']:>9.1f}s")
+    print(f"{'总耗时':<20}{sequential_seconds:>9.1f}s{parallel_seconds:>9.1f}s")
+    if speedup:
+        print(f"加速比: {speedup:.2f}倍")
+    print(f"对比报告已保存到: {output_file}")
+    
+    return report
 
 
 def main():
     """主菜单"""
-    print("\n" + "="*60)
-    print("网站自动化测试 - 并行执行示例")
-    print("="*60)
-    print("\n选择测试模式：")
-    print("1. 并行测试（推荐，速度快）")
-    print("2. 顺序测试（对比用）")
-    print("0. 退出")
+    parser = argparse.ArgumentParser(description="网站自动化测试 - 并行执行示例")
+    parser.add_argument("--tasks", help="任务列表JSON文件（默认使用内置的3个任务）")
+    parser.add_argument("--concurrency", type=int, default=3, help="并行模式同时运行的Agent数量")
+    parser.add_argument("--mode", choices=["parallel", "sequential", "compare"],
+                        help="运行模式，不指定时显示交互菜单")
+    args = parser.parse_args()
+    
+    tasks = load_tasks(args.tasks)
+    choice = {"parallel": "1", "sequential": "2", "compare": "3"}.get(args.mode)
     
-    choice = input("\n请输入选项 (0-2): ").strip()
+    if choice is None:
+        print("\n" + "="*60)
+        print("网站自动化测试 - 并行执行示例")
+        print("="*60)
+        print("\n选择测试模式：")
+        print("1. 并行测试（推荐，速度快）")
+        print("2. 顺序测试（对比用）")
+        print("3. 顺序 vs 并行耗时对比")
+        print("0. 退出")
+        
+        choice = input("\n请输入选项 (0-3): ").strip()
     
     if choice == "1":
-        asyncio.run(test_with_parallel())
+        asyncio.run(test_with_parallel(tasks, args.concurrency))
     elif choice == "2":
-        asyncio.run(test_sequential())
+        asyncio.run(test_sequential(tasks))
+    elif choice == "3":
+        asyncio.run(compare_modes(tasks, args.concurrency))
     elif choice == "0":
         print("退出程序")
     else:
@@ -0,0 +1,117 @@
+"""
+增量发现的HTTP预检：用本地http.server作为替身站点，覆盖304、DOM哈希不变、页面变化和sitemap四种情况
+
+运行：python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from parallel_test_core.incremental import PageChangeDetector
+
+
+class _Site:
+    """替身站点的可变状态"""
+    html = ""
+    etag = None
+    sitemap = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/sitemap.xml":
+            if _Site.sitemap is None:
+                self.send_error(404)
+                return
+            self._send(_Site.sitemap.encode(), "application/xml")
+            return
+        
+        if _Site.etag and self.headers.get("If-None-Match") == _Site.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self._send(_Site.html.encode(), "text/html; charset=utf-8")
+    
+    def _send(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if _Site.etag:
+            self.send_header("ETag", _Site.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+class PageChangeDetectorTest(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def setUp(self):
+        _Site.html = '<html><body><form><input name="csrf_token" value="a1"><button>提交</button></form><p>共3条</p></body></html>'
+        _Site.etag = None
+        _Site.sitemap = None
+        self.page = f"{self.base_url}/orders"
+        self.store_file = os.path.join(tempfile.mkdtemp(), "page_store.json")
+    
+    def check(self, detector: PageChangeDetector, lastmod=None):
+        return asyncio.run(detector.check(self.page, lastmod))
+    
+    def record_first_run(self) -> PageChangeDetector:
+        detector = PageChangeDetector(self.store_file)
+        result = self.check(detector)
+        self.assertEqual((result["changed"], result["reason"]), (True, "new"))
+        detector.record(self.page, result, features=[], regions=[])
+        detector.save()
+        return PageChangeDetector(self.store_file)
+    
+    def test_not_modified(self):
+        _Site.etag = '"v1"'
+        detector = self.record_first_run()
+        result = self.check(detector)
+        self.assertEqual((result["changed"], result["reason"]), (False, "not_modified"))
+    
+    def test_dom_hash_ignores_volatile_content(self):
+        detector = self.record_first_run()
+        _Site.html = _Site.html.replace('value="a1"', 'value="b2"').replace("共3条", "共12条")
+        result = self.check(detector)
+        self.assertEqual((result["changed"], result["reason"]), (False, "dom_hash"))
+    
+    def test_changed(self):
+        detector = self.record_first_run()
+        _Site.html = _Site.html.replace("<button>提交</button>", '<input name="note"><button>提交</button>')
+        result = self.check(detector)
+        self.assertEqual((result["changed"], result["reason"]), (True, "changed"))
+    
+    def test_sitemap_lastmod(self):
+        _Site.sitemap = (
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            f'<url><loc>{self.page}</loc><lastmod>2024-01-15</lastmod></url></urlset>'
+        )
+        detector = PageChangeDetector(self.store_file)
+        lastmod = asyncio.run(detector.fetch_sitemap(self.base_url)).get(self.page)
+        self.assertEqual(lastmod, "2024-01-15")
+        
+        detector.record(self.page, self.check(detector, lastmod), features=[], regions=[])
+        _Site.html = "<html><body>完全不同的页面</body></html>"
+        result = self.check(detector, lastmod)
+        self.assertEqual((result["changed"], result["reason"]), (False, "sitemap"))
+
+
+if __name__ == "__main__":
+    unittest.main()
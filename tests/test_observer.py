@@ -0,0 +1,164 @@
+"""
+网络观察器的真实浏览器检查：启动本机Chromium，用本地http.server作为替身站点，
+验证登录（POST + Set-Cookie）和登出（只有GET）按各自的规则通过
+
+需要Chromium（或通过CHROME_PATH指定）和cdp_use，缺少时跳过。
+运行：python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from parallel_test_core.features import FeaturePoint, auth_action
+from parallel_test_core.observer import NetworkObserver
+
+try:
+    from cdp_use import CDPClient
+except ImportError:
+    CDPClient = None
+
+
+def _find_chrome():
+    candidates = [os.environ.get("CHROME_PATH")]
+    candidates += [shutil.which(name) for name in
+                   ("chromium", "chromium-browser", "google-chrome", "google-chrome-stable", "chrome-headless-shell")]
+    return next((path for path in candidates if path), None)
+
+
+CHROME = _find_chrome()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/logout":
+            self._redirect("/", "sid=; Max-Age=0")
+            return
+        if self.path == "/home":
+            self._send('<html><body>欢迎 <a href="/logout">退出登录</a></body></html>')
+            return
+        self._send('<html><body><form method="post" action="/login">'
+                   '<input name="username" value="admin"><input name="password" value="admin">'
+                   '<button>登录</button></form></body></html>')
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._redirect("/home", "sid=1; Path=/")
+    
+    def _redirect(self, location: str, cookie: str):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Set-Cookie", cookie)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+    
+    def _send(self, html: str):
+        body = html.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipIf(CHROME is None or CDPClient is None, "需要Chromium和cdp_use")
+class NetworkObserverBrowserTest(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        
+        cls.profile = tempfile.mkdtemp()
+        cls.chrome = subprocess.Popen(
+            [CHROME, "--headless=new", "--no-sandbox", "--remote-debugging-port=0",
+             f"--user-data-dir={cls.profile}", "about:blank"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        # Chromium启动后在stderr打印浏览器级别的CDP地址
+        cls.ws_url = None
+        for line in cls.chrome.stderr:
+            match = re.search(r"DevTools listening on (ws://\S+)", line)
+            if match:
+                cls.ws_url = match.group(1)
+                break
+        if cls.ws_url is None:
+            cls.tearDownClass()
+            raise unittest.SkipTest("Chromium没有输出CDP地址")
+        # 继续读完stderr，避免管道写满后阻塞浏览器
+        threading.Thread(target=cls.chrome.stderr.read, daemon=True).start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.chrome.kill()
+        cls.chrome.wait()
+        cls.server.shutdown()
+        cls.server.server_close()
+        shutil.rmtree(cls.profile, ignore_errors=True)
+    
+    def test_login_and_logout_rules(self):
+        login, logout = asyncio.run(self._run())
+        self.assertTrue(login["passed"], login)
+        self.assertTrue(logout["passed"], logout)
+    
+    async def _run(self):
+        observer = NetworkObserver()
+        self.assertTrue(await observer.attach(SimpleNamespace(cdp_client=SimpleNamespace(url=self.ws_url))))
+        
+        # 另开一条CDP连接充当Agent，驱动页面
+        driver = CDPClient(self.ws_url)
+        await driver.start()
+        try:
+            targets = await driver.send.Target.getTargets()
+            page = next(t for t in targets["targetInfos"] if t["type"] == "page")
+            session = await driver.send.Target.attachToTarget(params={"targetId": page["targetId"], "flatten": True})
+            session_id = session["sessionId"]
+            
+            await driver.send.Page.navigate(params={"url": f"{self.base_url}/"}, session_id=session_id)
+            await self._wait_for(observer, "/")
+            
+            observer.reset()
+            await driver.send.Runtime.evaluate(params={"expression": "document.forms[0].submit()"},
+                                               session_id=session_id)
+            await self._wait_for(observer, "/home")
+            login_feature = FeaturePoint(id="1", type="form", category="auth", description="登录表单")
+            login = observer.verify("auth", auth_action(login_feature))
+            
+            observer.reset()
+            await driver.send.Page.navigate(params={"url": f"{self.base_url}/logout"}, session_id=session_id)
+            await self._wait_for(observer, "/")
+            logout_feature = FeaturePoint(id="2", type="link", category="auth", description="退出登录")
+            logout = observer.verify("auth", auth_action(logout_feature))
+            return login, logout
+        finally:
+            await driver.stop()
+            await observer.detach()
+    
+    async def _wait_for(self, observer: NetworkObserver, path: str, timeout: float = 10.0):
+        """等待观察器记录到该路径的文档请求完成"""
+        url = f"{self.base_url}{path}"
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if any(e["url"] == url and e["resource_type"] == "document" and e["status"] == 200
+                   for e in observer.requests):
+                # Set-Cookie来自单独的ExtraInfo事件，留一点时间让它到达
+                await asyncio.sleep(0.2)
+                return
+            await asyncio.sleep(0.1)
+        self.fail(f"等待 {url} 超时: {observer.requests}")
+
+
+if __name__ == "__main__":
+    unittest.main()